@@ -0,0 +1,112 @@
+"""
+Times the AST technique's source scan on a generated 10k line script, comparing the
+single pass SourceIndex used by parse_source_file against the per-query tree walks of
+the get_nodes_by_* helpers it replaced.
+
+Usage: python benchmarks/source_parser.py [number of lines]
+"""
+
+import _ast
+import ast
+import os
+import sys
+import tempfile
+import time
+
+from clinto.ast import source_parser
+
+
+def generate_script(lines):
+    source = [
+        "import argparse",
+        "import os",
+        "parser = argparse.ArgumentParser(description='Benchmark')",
+    ]
+    index = 0
+    while len(source) < lines:
+        source.extend(
+            [
+                "DEFAULT_{0} = {0}".format(index),
+                "def helper_{0}(value):".format(index),
+                "    return os.path.join(str(value), 'data_{0}')".format(index),
+                "parser.add_argument('--option-{0}', type=int, default=DEFAULT_{0})".format(
+                    index
+                ),
+                "result_{0} = helper_{0}(DEFAULT_{0})".format(index),
+            ]
+        )
+        index += 1
+    source.append("args = parser.parse_args()")
+    return "\n".join(source) + "\n"
+
+
+def legacy_queries(nodes):
+    assignment_objs = source_parser.get_nodes_by_instance_type(nodes, _ast.Assign)
+    call_objects = source_parser.get_nodes_by_instance_type(nodes, _ast.Call)
+    source_parser.get_nodes_by_instance_type(nodes, _ast.Import)
+    source_parser.get_nodes_by_instance_type(nodes, _ast.ImportFrom)
+    argparse_assignments = source_parser.get_nodes_by_containing_attr(
+        assignment_objs, "ArgumentParser"
+    )
+    source_parser.get_nodes_by_containing_attr(assignment_objs, "add_argument_group")
+    add_arg_assignments = source_parser.get_nodes_by_containing_attr(
+        call_objects, "add_argument"
+    )
+    parse_args_assignment = source_parser.get_nodes_by_containing_attr(
+        call_objects, "parse_args"
+    )
+    for assignments, selector in [
+        (argparse_assignments, "ArgumentParser"),
+        (add_arg_assignments, "add_argument"),
+        (parse_args_assignment, "parse_args"),
+    ]:
+        source_parser.get_node_args_and_keywords(assignment_objs, assignments, selector)
+
+
+def indexed_queries(nodes):
+    index = source_parser.SourceIndex(nodes)
+    index.get_nodes_by_instance_type(_ast.Import)
+    index.get_nodes_by_instance_type(_ast.ImportFrom)
+    argparse_assignments = index.get_nodes_by_containing_attr(
+        _ast.Assign, "ArgumentParser"
+    )
+    index.get_nodes_by_containing_attr(_ast.Assign, "add_argument_group")
+    add_arg_assignments = index.get_nodes_by_containing_attr(_ast.Call, "add_argument")
+    parse_args_assignment = index.get_nodes_by_containing_attr(_ast.Call, "parse_args")
+    for assignments, selector in [
+        (argparse_assignments, "ArgumentParser"),
+        (add_arg_assignments, "add_argument"),
+        (parse_args_assignment, "parse_args"),
+    ]:
+        index.get_node_args_and_keywords(assignments, selector)
+
+
+def best_of(func, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    source = generate_script(lines)
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+        f.write(source)
+    try:
+        nodes = ast.parse(source)
+        legacy = best_of(lambda: legacy_queries(nodes))
+        indexed = best_of(lambda: indexed_queries(nodes))
+        total = best_of(lambda: list(source_parser.parse_source_file(f.name)))
+    finally:
+        os.remove(f.name)
+    print("lines: {0}".format(source.count("\n")))
+    print("per-query tree walks: {0:.3f}s".format(legacy))
+    print("SourceIndex: {0:.3f}s ({1:.1f}x)".format(indexed, legacy / indexed))
+    print("parse_source_file, including ast.parse: {0:.3f}s".format(total))
+
+
+if __name__ == "__main__":
+    main()
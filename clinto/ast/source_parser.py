@@ -7,26 +7,127 @@ Collection of functions for extracting argparse related statements from the
 client code.
 """
 
+import argparse
 import ast
 import _ast
+import importlib.util
+import operator
+import sys
+from collections import defaultdict, deque
 from itertools import chain
 
 import astor
 
+from ..utils import get_context_sys_path, range_length
+
+# Maps (module name, import path) to whether the module can be found. This is process wide
+# so scripts sharing imports only pay for the lookup once.
+_resolvable_modules = {}
+
+
+def _find_spec(module_name):
+    """
+    Finds the spec of a module without importing it, or any of its parent packages.
+    """
+    parts = module_name.split(".")
+    spec = importlib.util.find_spec(parts[0])
+    for index in range(1, len(parts)):
+        if spec is None or spec.submodule_search_locations is None:
+            return None
+        name = ".".join(parts[: index + 1])
+        locations = list(spec.submodule_search_locations)
+        spec = None
+        for finder in sys.meta_path:
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is not None:
+                spec = find_spec(name, locations)
+            if spec is not None:
+                break
+    return spec
+
+
+def is_module_resolvable(module_name):
+    """
+    Returns whether module_name could be imported, without executing the import.
+    """
+    if module_name in sys.modules:
+        return True
+    # Finders that only exist for the duration of an extraction, like the stub
+    # importer, must not leak into the memo
+    for finder in sys.meta_path:
+        if getattr(finder, "transient", False) and finder.find_spec(module_name):
+            return True
+    key = (module_name, get_context_sys_path() + tuple(sys.path))
+    resolvable = _resolvable_modules.get(key)
+    if resolvable is None:
+        try:
+            resolvable = _find_spec(module_name) is not None
+        except (ImportError, ValueError):
+            resolvable = False
+        _resolvable_modules[key] = resolvable
+    return resolvable
+
+
+def guarded_import(import_module):
+    """
+    Wraps import_module in a try statement ignoring ImportError.
+    """
+    handler = _ast.ExceptHandler(
+        type=_ast.Name(id="ImportError", ctx=_ast.Load()), name=None, body=[_ast.Pass()]
+    )
+    return ast.copy_location(
+        _ast.Try(body=[import_module], handlers=[handler], orelse=[], finalbody=[]),
+        import_module,
+    )
+
 
 def find_valid_imports(imports):
+    """
+    Filters imports down to those whose modules can be found. Relative imports are
+    never valid, as the curated source is run outside of its package.
+
+    Whether a name imported from a module, which is not a submodule of it, exists is
+    unknown without importing the module. Each such name is imported on its own and
+    guarded, so a missing one is skipped rather than failing the curated source.
+    """
     valid_imports = []
     for import_module in imports:
-        try:
-            exec(astor.to_source(import_module))
-        except (ImportError, ModuleNotFoundError):
-            pass
-        else:
+        if isinstance(import_module, _ast.ImportFrom):
+            module = import_module.module
+            if not module or import_module.level or not is_module_resolvable(module):
+                continue
+            unverified = [
+                alias
+                for alias in import_module.names
+                if alias.name != "*"
+                and not is_module_resolvable("{0}.{1}".format(module, alias.name))
+            ]
+            if not unverified:
+                valid_imports.append(import_module)
+                continue
+            verified = [i for i in import_module.names if i not in unverified]
+            if verified:
+                valid_imports.append(
+                    ast.copy_location(
+                        _ast.ImportFrom(module=module, names=verified, level=0),
+                        import_module,
+                    )
+                )
+            for alias in unverified:
+                valid_imports.append(
+                    guarded_import(
+                        ast.copy_location(
+                            _ast.ImportFrom(module=module, names=[alias], level=0),
+                            import_module,
+                        )
+                    )
+                )
+        elif all(is_module_resolvable(alias.name) for alias in import_module.names):
             valid_imports.append(import_module)
     return valid_imports
 
 
-def parse_source_file(file_name, ignore_bad_imports=False):
+def parse_source_file(file_name, ignore_bad_imports=False, source=None):
     """
     Parses the AST of Python file for lines containing
     references to the argparse module.
@@ -46,30 +147,31 @@ def parse_source_file(file_name, ignore_bad_imports=False):
       * add_arg_assignments     Calls to add_argument() (lines 2-3 in example code)
       * parser_var_name                    The instance variable of the ArgumentParser (line 1 in example code)
       * ast_source                            The curated collection of all parser related nodes in the client code
+
+    The source may be given directly, e.g. when file_name is inside a zip archive.
     """
-    with open(file_name, "r") as f:
-        s = f.read()
+    if source is None:
+        with open(file_name, "r") as f:
+            source = f.read()
 
-    nodes = ast.parse(s)
+    nodes = ast.parse(source)
+    index = SourceIndex(nodes)
 
-    module_imports = get_nodes_by_instance_type(nodes, _ast.Import)
-    specific_imports = get_nodes_by_instance_type(nodes, _ast.ImportFrom)
+    module_imports = index.get_nodes_by_instance_type(_ast.Import)
+    specific_imports = index.get_nodes_by_instance_type(_ast.ImportFrom)
 
     if ignore_bad_imports:
         module_imports = find_valid_imports(module_imports)
         specific_imports = find_valid_imports(specific_imports)
 
-    assignment_objs = get_nodes_by_instance_type(nodes, _ast.Assign)
-    call_objects = get_nodes_by_instance_type(nodes, _ast.Call)
-
-    argparse_assignments = get_nodes_by_containing_attr(
-        assignment_objs, "ArgumentParser"
+    argparse_assignments = index.get_nodes_by_containing_attr(
+        _ast.Assign, "ArgumentParser"
     )
-    group_arg_assignments = get_nodes_by_containing_attr(
-        assignment_objs, "add_argument_group"
+    group_arg_assignments = index.get_nodes_by_containing_attr(
+        _ast.Assign, "add_argument_group"
     )
-    add_arg_assignments = get_nodes_by_containing_attr(call_objects, "add_argument")
-    parse_args_assignment = get_nodes_by_containing_attr(call_objects, "parse_args")
+    add_arg_assignments = index.get_nodes_by_containing_attr(_ast.Call, "add_argument")
+    parse_args_assignment = index.get_nodes_by_containing_attr(_ast.Call, "parse_args")
     # there are cases where we have custom argparsers, such as subclassing ArgumentParser. The above
     # will fail on this. However, we can use the methods known to ArgumentParser to do a duck-type like
     # approach to finding what is the arg parser
@@ -80,11 +182,11 @@ def parse_source_file(file_name, ignore_bad_imports=False):
         argparse_like_objects = [
             getattr(i.value.func, "id", None)
             for p_ref in aa_references
-            for i in get_nodes_by_containing_attr(assignment_objs, p_ref)
+            for i in index.get_nodes_by_containing_attr(_ast.Assign, p_ref)
         ]
         argparse_like_objects = filter(None, argparse_like_objects)
         argparse_assignments = [
-            get_nodes_by_containing_attr(assignment_objs, i)
+            index.get_nodes_by_containing_attr(_ast.Assign, i)
             for i in argparse_like_objects
         ]
         # for now, we just choose one
@@ -94,14 +196,14 @@ def parse_source_file(file_name, ignore_bad_imports=False):
             pass
 
     # get things that are assigned inside ArgumentParser or its methods
-    argparse_assigned_variables = get_node_args_and_keywords(
-        assignment_objs, argparse_assignments, "ArgumentParser"
+    argparse_assigned_variables = index.get_node_args_and_keywords(
+        argparse_assignments, "ArgumentParser"
     )
-    add_arg_assigned_variables = get_node_args_and_keywords(
-        assignment_objs, add_arg_assignments, "add_argument"
+    add_arg_assigned_variables = index.get_node_args_and_keywords(
+        add_arg_assignments, "add_argument"
     )
-    parse_args_assigned_variables = get_node_args_and_keywords(
-        assignment_objs, parse_args_assignment, "parse_args"
+    parse_args_assigned_variables = index.get_node_args_and_keywords(
+        parse_args_assignment, "parse_args"
     )
 
     ast_argparse_source = chain(
@@ -117,6 +219,116 @@ def parse_source_file(file_name, ignore_bad_imports=False):
     return ast_argparse_source
 
 
+class SourceIndex(object):
+    """
+    Lookup tables over a parsed module, built in a single pass, for answering the
+    queries of parse_source_file. Results match those of get_nodes_by_instance_type,
+    get_nodes_by_containing_attr and get_node_args_and_keywords, including ordering,
+    without walking the tree once per query.
+    """
+
+    # Node types that may be looked up by the names they contain
+    ATTR_INDEXED_TYPES = (_ast.Assign, _ast.Call)
+
+    def __init__(self, nodes):
+        self.nodes_by_type = defaultdict(list)
+        for node in self.walk(nodes):
+            self.nodes_by_type[type(node)].append(node)
+
+        self._contained_names = {}
+        self.nodes_by_attr = {}
+        for node_type in self.ATTR_INDEXED_TYPES:
+            by_attr = defaultdict(list)
+            for node in self.nodes_by_type[node_type]:
+                for name in self.contained_names(node):
+                    by_attr[name].append(node)
+            self.nodes_by_attr[node_type] = by_attr
+
+        self.name_ids = set(i.id for i in self.nodes_by_type[_ast.Name])
+
+        # target name -> [(assignment position, target position, assignment)]
+        self.assignments_by_target = defaultdict(list)
+        for position, node in enumerate(self.nodes_by_type[_ast.Assign]):
+            for target_position, target in enumerate(node.targets):
+                target_id = getattr(target, "id", None)
+                if target_id is not None:
+                    self.assignments_by_target[target_id].append(
+                        (position, target_position, node)
+                    )
+
+    @staticmethod
+    def walk(nodes):
+        """
+        Yields the AST nodes of walk_tree(nodes), in the same order. Lists are walked
+        breadth first like ast.walk, but without its per-node generator overhead.
+        """
+        for value in nodes.__dict__.values():
+            if isinstance(value, list):
+                for val in value:
+                    todo = deque([val])
+                    while todo:
+                        node = todo.popleft()
+                        for field in node._fields:
+                            child = getattr(node, field, None)
+                            if isinstance(child, list):
+                                todo.extend(i for i in child if isinstance(i, ast.AST))
+                            elif isinstance(child, ast.AST):
+                                todo.append(child)
+                        yield node
+            elif isinstance(value, ast.AST):
+                for node in SourceIndex.walk(value):
+                    yield node
+
+    def contained_names(self, node):
+        """
+        The strings walk_tree yields for node, i.e. those reachable through fields that
+        are not lists. Shared subtrees are only computed once.
+        """
+        names = self._contained_names.get(id(node))
+        if names is None:
+            # Sets are never mutated once built, so a node with a single child and no
+            # strings of its own shares the set of that child
+            names = frozenset()
+            for value in node.__dict__.values():
+                if isinstance(value, ast.AST):
+                    child_names = self.contained_names(value)
+                    names = names | child_names if names else child_names
+                elif isinstance(value, str):
+                    names = names | {value}
+            self._contained_names[id(node)] = names
+        return names
+
+    def get_nodes_by_instance_type(self, object_type):
+        return list(self.nodes_by_type[object_type])
+
+    def get_nodes_by_containing_attr(self, node_type, attr):
+        return list(self.nodes_by_attr[node_type].get(attr, []))
+
+    def get_node_args_and_keywords(self, assignments, selector=None):
+        # Variables are only collected from the line where selector is used as a name,
+        # e.g. ArgumentParser(prog=PROG), so without such a name there is nothing to walk
+        if selector not in self.name_ids:
+            return []
+        referenced_nodes = set([])
+        selector_line = -1
+        for node in assignments:
+            for i in walk_tree(node):
+                if (
+                    i
+                    and isinstance(i, (_ast.keyword, _ast.Name))
+                    and "id" in i.__dict__
+                ):
+                    if i.id == selector:
+                        selector_line = i.lineno
+                    elif i.lineno == selector_line:
+                        referenced_nodes.add(i.id)
+        matches = sorted(
+            (i for name in referenced_nodes for i in self.assignments_by_target[name]),
+            key=lambda x: x[:2],
+        )
+        return [node for _, _, node in matches]
+
+
 def read_client_module(filename):
     with open(filename, "r") as f:
         return f.readlines()
@@ -166,8 +378,413 @@ def walk_tree(node):
             yield value
 
 
+def compile_ast_source(ast_source, file_name="<ast>"):
+    """
+    Compiles the curated ast objects straight to a code object, without converting them
+    back into source. Expressions, such as add_argument calls, become statements.
+    """
+    body = []
+    for node in ast_source:
+        if not isinstance(node, ast.stmt):
+            node = ast.copy_location(ast.Expr(value=node), node)
+        body.append(node)
+    module = ast.fix_missing_locations(ast.Module(body=body, type_ignores=[]))
+    return compile(module, file_name, "exec")
+
+
 def convert_to_python(ast_source):
     """
     Converts the ast objects back into human readable Python code
     """
     return map(astor.to_source, ast_source)
+
+
+class StaticEvaluationError(ValueError):
+    """
+    Raised when a script's ArgumentParser cannot be built without executing it.
+    """
+
+
+class _Unresolved(object):
+    """
+    Placeholder bound to names whose value is unknown without executing the script,
+    such as anything imported from a module other than argparse.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+
+def _placeholder_function(name):
+    # A stand-in for a function defined in the script, e.g. one used as type=. Like the
+    # real function, it is a plain python function, which is all ArgParseNode needs.
+    def placeholder(value):
+        return value
+
+    placeholder.__name__ = placeholder.__qualname__ = name
+    return placeholder
+
+
+STATIC_BUILTINS = {
+    i.__name__: i
+    for i in (bool, dict, float, frozenset, int, len, list, range, set, str, tuple)
+}
+
+
+def is_static_builtin(value):
+    return any(value is i for i in STATIC_BUILTINS.values())
+
+
+# Methods of ArgumentParser and its groups that may be called when building a parser
+STATIC_PARSER_METHODS = {
+    "add_argument",
+    "add_argument_group",
+    "add_mutually_exclusive_group",
+    "add_parser",
+    "add_subparsers",
+    "set_defaults",
+}
+STATIC_PARSE_METHODS = {"parse_args", "parse_known_args"}
+# Methods that only read a parser, which statements that are not evaluated may call
+STATIC_READ_METHODS = STATIC_PARSE_METHODS | {
+    "error",
+    "exit",
+    "format_help",
+    "format_usage",
+    "print_help",
+    "print_usage",
+}
+
+STATIC_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+# The largest int (in bits) and sequence (in items) the operators and builtins may
+# build, so a script cannot make evaluating it exhaust memory or time, e.g. with
+# "a" * 10**10 or 10**10**10
+MAX_STATIC_INT_BITS = 1 << 16
+MAX_STATIC_LENGTH = 1 << 20
+STATIC_SEQUENCES = (str, bytes, list, tuple)
+
+
+def check_static_operands(op, left, right):
+    """
+    Raises StaticEvaluationError if left op right would be larger than
+    MAX_STATIC_INT_BITS or MAX_STATIC_LENGTH, before computing it.
+    """
+    ints = isinstance(left, int) and isinstance(right, int)
+    too_large = False
+    if op is ast.Pow and ints:
+        too_large = (
+            right > 0
+            and abs(left) > 1
+            and right * left.bit_length() > MAX_STATIC_INT_BITS
+        )
+    elif op is ast.Mult and ints:
+        too_large = left.bit_length() + right.bit_length() > MAX_STATIC_INT_BITS
+    elif op is ast.Mult:
+        too_large = any(
+            isinstance(sequence, STATIC_SEQUENCES)
+            and isinstance(count, int)
+            and len(sequence) * count > MAX_STATIC_LENGTH
+            for sequence, count in ((left, right), (right, left))
+        )
+    elif op is ast.Add and isinstance(left, STATIC_SEQUENCES):
+        too_large = (
+            isinstance(right, STATIC_SEQUENCES)
+            and len(left) + len(right) > MAX_STATIC_LENGTH
+        )
+    if too_large:
+        raise StaticEvaluationError(
+            "The result of {0} is too large to evaluate statically".format(op.__name__)
+        )
+
+
+STATIC_UNARY_OPERATORS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+    ast.Not: operator.not_,
+}
+
+
+class StaticArgParseEvaluator(object):
+    """
+    Builds the ArgumentParser of a script by evaluating only the calls that construct
+    it. Literals, names bound to literals and the argparse module are resolved from the
+    AST; nothing the script imports is loaded and none of its other code is run.
+    """
+
+    def __init__(self, source):
+        self.tree = ast.parse(source)
+        self.parsers = []
+        self.parsed = []
+        # Objects created by argparse calls, keyed by id. Only these may have methods
+        # called on them.
+        self.argparse_objects = {}
+        # Functions defined by the script, by name, whose calls are not evaluated
+        self.functions = {}
+
+    def evaluate(self):
+        module_scope = dict(STATIC_BUILTINS, argparse=argparse, __name__="__main__")
+        self.evaluate_body(self.tree.body, module_scope)
+        if not self.parsers:
+            # The parser is commonly built inside a main() or get_parser() function
+            for node in self.tree.body:
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    self.evaluate_body(node.body, dict(module_scope))
+                    if self.parsers:
+                        break
+        if self.parsed:
+            return self.parsed[0]
+        if self.parsers:
+            return self.parsers[0]
+        raise StaticEvaluationError("No ArgumentParser found")
+
+    def evaluate_body(self, body, scope):
+        for node in body:
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    name = alias.asname or alias.name.split(".")[0]
+                    scope[name] = (
+                        argparse if alias.name == "argparse" else _Unresolved(name)
+                    )
+            elif isinstance(node, ast.ImportFrom):
+                for alias in node.names:
+                    name = alias.asname or alias.name
+                    if node.module == "argparse" and hasattr(argparse, alias.name):
+                        scope[name] = getattr(argparse, alias.name)
+                    else:
+                        scope[name] = _Unresolved(name)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                scope[node.name] = _placeholder_function(node.name)
+                self.functions[node.name] = node
+            elif isinstance(node, ast.ClassDef):
+                scope[node.name] = _Unresolved(node.name)
+            elif isinstance(node, ast.Assign):
+                self.evaluate_assignment(node, scope)
+            elif isinstance(node, ast.Expr) and self.is_argparse_call(
+                node.value, scope
+            ):
+                self.evaluate_node(node.value, scope)
+            elif isinstance(node, ast.If) and self.is_main_check(node.test):
+                self.evaluate_body(node.body, scope)
+                self.check_skipped(node.orelse, scope)
+            elif not isinstance(node, (ast.Return, ast.Pass)):
+                # Loops, try blocks, other conditions and calls to helper functions
+                # are not evaluated
+                self.check_skipped(node, scope)
+
+    def evaluate_assignment(self, node, scope):
+        try:
+            value = self.evaluate_node(node.value, scope)
+        except StaticEvaluationError:
+            # Only fail when an unknown value is actually used to build the parser
+            if self.is_argparse_call(node.value, scope):
+                raise
+            self.check_skipped(node.value, scope)
+            value = _Unresolved(getattr(node.targets[0], "id", ""))
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                scope[target.id] = value
+            else:
+                # e.g. parser.prog = ..., which is not evaluated
+                self.check_skipped(target, scope)
+
+    def check_skipped(self, nodes, scope):
+        """
+        Raises StaticEvaluationError if code that is not evaluated may change a parser,
+        as the parser built without it would be incomplete.
+        """
+        if not isinstance(nodes, list):
+            nodes = [nodes]
+        for node in nodes:
+            if self.references_argparse_objects(node, scope, set()):
+                raise StaticEvaluationError(
+                    "Line {0} uses a parser but cannot be evaluated statically".format(
+                        getattr(node, "lineno", "?")
+                    )
+                )
+
+    def references_argparse_objects(self, node, scope, seen_functions):
+        """
+        Whether node refers to a name bound to an argparse object (or one of its
+        methods), other than to read it with one of STATIC_READ_METHODS. The bodies of
+        script functions it refers to are searched too.
+        """
+        if (
+            isinstance(node, ast.Attribute)
+            and node.attr in STATIC_READ_METHODS
+            and isinstance(node.value, ast.Name)
+        ):
+            return False
+        if isinstance(node, ast.Name):
+            value = scope.get(node.id)
+            if id(value) in self.argparse_objects or (
+                id(getattr(value, "__self__", None)) in self.argparse_objects
+            ):
+                return True
+            function = self.functions.get(node.id)
+            if function is None or node.id in seen_functions:
+                return False
+            seen_functions.add(node.id)
+            node = function
+        return any(
+            self.references_argparse_objects(i, scope, seen_functions)
+            for i in ast.iter_child_nodes(node)
+        )
+
+    def is_argparse_call(self, node, scope):
+        """
+        Whether node calls a method of a parser (or group) or constructs one.
+        """
+        if not isinstance(node, ast.Call):
+            return False
+        func = node.func
+        if isinstance(func, ast.Attribute):
+            if func.attr in STATIC_PARSER_METHODS | STATIC_PARSE_METHODS:
+                return True
+            if func.attr == "ArgumentParser":
+                return True
+        return (
+            isinstance(func, ast.Name) and scope.get(func.id) is argparse.ArgumentParser
+        )
+
+    @staticmethod
+    def is_main_check(node):
+        return (
+            isinstance(node, ast.Compare)
+            and isinstance(node.left, ast.Name)
+            and node.left.id == "__name__"
+            and len(node.comparators) == 1
+            and isinstance(node.comparators[0], ast.Constant)
+            and node.comparators[0].value == "__main__"
+        )
+
+    def evaluate_node(self, node, scope):
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name):
+            if node.id not in scope:
+                raise StaticEvaluationError("Unknown name {0}".format(node.id))
+            value = scope[node.id]
+            if isinstance(value, _Unresolved):
+                raise StaticEvaluationError(
+                    "{0} cannot be resolved statically".format(value.name)
+                )
+            return value
+        if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            values = [self.evaluate_node(i, scope) for i in node.elts]
+            return {ast.List: list, ast.Tuple: tuple, ast.Set: set}[type(node)](values)
+        if isinstance(node, ast.Dict):
+            if any(i is None for i in node.keys):
+                raise StaticEvaluationError("Dictionary unpacking is not supported")
+            return dict(
+                (self.evaluate_node(k, scope), self.evaluate_node(v, scope))
+                for k, v in zip(node.keys, node.values)
+            )
+        if isinstance(node, ast.UnaryOp) and type(node.op) in STATIC_UNARY_OPERATORS:
+            return STATIC_UNARY_OPERATORS[type(node.op)](
+                self.evaluate_node(node.operand, scope)
+            )
+        if isinstance(node, ast.BinOp) and type(node.op) in STATIC_BINARY_OPERATORS:
+            left = self.evaluate_node(node.left, scope)
+            right = self.evaluate_node(node.right, scope)
+            check_static_operands(type(node.op), left, right)
+            try:
+                return STATIC_BINARY_OPERATORS[type(node.op)](left, right)
+            except ArithmeticError as e:
+                raise StaticEvaluationError(str(e)) from None
+        if isinstance(node, ast.Lambda):
+            return _placeholder_function("<lambda>")
+        if isinstance(node, ast.Attribute):
+            return self.evaluate_attribute(node, scope)
+        if isinstance(node, ast.Call):
+            return self.evaluate_call(node, scope)
+        raise StaticEvaluationError(
+            "{0} cannot be evaluated statically".format(type(node).__name__)
+        )
+
+    def evaluate_attribute(self, node, scope):
+        value = self.evaluate_node(node.value, scope)
+        if value is argparse or is_static_builtin(value):
+            try:
+                return getattr(value, node.attr)
+            except AttributeError:
+                raise StaticEvaluationError(
+                    "Unknown attribute {0}".format(node.attr)
+                ) from None
+        if id(value) in self.argparse_objects and node.attr in STATIC_PARSER_METHODS:
+            return getattr(value, node.attr)
+        raise StaticEvaluationError(
+            "Attribute {0} cannot be resolved statically".format(node.attr)
+        )
+
+    def evaluate_call(self, node, scope):
+        func = node.func
+        if isinstance(func, ast.Attribute) and func.attr in STATIC_PARSE_METHODS:
+            parser = self.evaluate_node(func.value, scope)
+            if id(parser) not in self.argparse_objects:
+                raise StaticEvaluationError("parse_args called on an unknown object")
+            self.parsed.append(parser)
+            return _Unresolved(func.attr)
+
+        callable_ = self.evaluate_node(func, scope)
+        allowed = (
+            is_static_builtin(callable_)
+            or (
+                getattr(callable_, "__module__", None) == "argparse"
+                and isinstance(callable_, type)
+            )
+            or id(getattr(callable_, "__self__", None)) in self.argparse_objects
+        )
+        if not allowed:
+            raise StaticEvaluationError(
+                "{0} cannot be called statically".format(
+                    getattr(callable_, "__name__", callable_)
+                )
+            )
+
+        args = []
+        for arg in node.args:
+            if isinstance(arg, ast.Starred):
+                raise StaticEvaluationError("Argument unpacking is not supported")
+            args.append(self.evaluate_node(arg, scope))
+        kwargs = {}
+        for keyword in node.keywords:
+            if keyword.arg is None:
+                raise StaticEvaluationError("Keyword unpacking is not supported")
+            kwargs[keyword.arg] = self.evaluate_node(keyword.value, scope)
+
+        # Ranges are lazy, but builtins such as list would expand them
+        if is_static_builtin(callable_) and callable_ is not range:
+            for value in chain(args, kwargs.values()):
+                if isinstance(value, range) and range_length(value) > MAX_STATIC_LENGTH:
+                    raise StaticEvaluationError(
+                        "{0} of a range this long cannot be evaluated "
+                        "statically".format(callable_.__name__)
+                    )
+
+        result = callable_(*args, **kwargs)
+        if isinstance(
+            result,
+            (argparse.ArgumentParser, argparse._ActionsContainer, argparse.Action),
+        ):
+            self.argparse_objects[id(result)] = result
+            if callable_ is argparse.ArgumentParser:
+                self.parsers.append(result)
+        return result
+
+
+def build_argparse_parser(source):
+    """
+    Builds the ArgumentParser defined in source without executing the script.
+
+    Raises StaticEvaluationError if the parser depends on anything that cannot be
+    resolved from the source alone.
+    """
+    return StaticArgParseEvaluator(source).evaluate()
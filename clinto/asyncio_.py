@@ -0,0 +1,125 @@
+"""
+Extract script descriptions without blocking the event loop. Each script is parsed in
+its own Python subprocess, which is killed if the extraction times out or the awaiting
+task is cancelled.
+"""
+
+import asyncio
+import os
+import pickle
+import sys
+import traceback
+
+from .batch import ParseResult, parse_script
+from .isolation import format_error, set_resource_limits
+from .utils import redirect_script_output
+
+# The worker reads the parent's sys.path from stdin first, so it imports clinto, and
+# the script its modules, from the same places as the parent
+WORKER_COMMAND = (
+    "import pickle, sys; sys.path[:] = pickle.load(sys.stdin.buffer); "
+    "from clinto.asyncio_ import _worker_main; _worker_main()"
+)
+
+
+async def _kill(process):
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+
+async def parse_script_async(
+    script_path, timeout=None, cpu_time_limit=None, memory_limit=None, **parser_kwargs
+):
+    """
+    Parses script_path in a subprocess, returning a ParseResult. The description is
+    the structure returned by Parser.get_script_description, or None on failure.
+
+    :param timeout: Seconds of wall-clock time before the subprocess is killed.
+    :param cpu_time_limit: Seconds of CPU time the subprocess may use.
+    :param memory_limit: Bytes of address space the subprocess may use.
+    :param parser_kwargs: Passed to the Parser in the subprocess.
+    """
+    request = b"".join(
+        pickle.dumps(i, protocol=pickle.HIGHEST_PROTOCOL)
+        for i in [
+            list(sys.path),
+            (script_path, cpu_time_limit, memory_limit, parser_kwargs),
+        ]
+    )
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-c",
+        WORKER_COMMAND,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(request), timeout)
+    except asyncio.TimeoutError:
+        return ParseResult(
+            script_path,
+            None,
+            format_error(
+                "Script did not finish within the {0} second timeout\n".format(timeout)
+            ),
+        )
+    finally:
+        # Also reached when the awaiting task is cancelled
+        await _kill(process)
+
+    try:
+        return pickle.loads(stdout)
+    except Exception:
+        # The subprocess died without reporting back
+        return ParseResult(
+            script_path,
+            None,
+            format_error(
+                "Script exited with code {0}\n{1}".format(
+                    process.returncode, stderr.decode("utf-8", "replace")
+                )
+            ),
+        )
+
+
+async def parse_scripts_async(script_paths, workers=None, **kwargs):
+    """
+    Parses many scripts concurrently with parse_script_async, running at most workers
+    (by default the number of CPUs) subprocesses at once. Yields a ParseResult for each
+    script as it finishes.
+    """
+    semaphore = asyncio.Semaphore(workers or os.cpu_count() or 1)
+
+    async def parse(script_path):
+        async with semaphore:
+            return await parse_script_async(script_path, **kwargs)
+
+    tasks = [asyncio.ensure_future(parse(i)) for i in script_paths]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _worker_main():
+    output = redirect_script_output("wb")
+    script_path, cpu_time_limit, memory_limit, parser_kwargs = pickle.load(
+        sys.stdin.buffer
+    )
+    try:
+        set_resource_limits(cpu_time_limit=cpu_time_limit, memory_limit=memory_limit)
+        result = parse_script(script_path, **parser_kwargs)
+    except MemoryError:
+        result = ParseResult(script_path, None, format_error("MemoryError\n"))
+    except BaseException:
+        result = ParseResult(script_path, None, format_error(traceback.format_exc()))
+    with output:
+        pickle.dump(result, output, protocol=pickle.HIGHEST_PROTOCOL)
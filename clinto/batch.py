@@ -0,0 +1,132 @@
+"""
+Parse many scripts at once, fanning them out across a pool of worker processes (or
+threads).
+"""
+
+import multiprocessing
+import os
+import sys
+import traceback
+from collections import namedtuple
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+
+from .parser import Parser
+from .utils import to_plain_data
+
+ParseResult = namedtuple("ParseResult", ["path", "description", "error"])
+
+
+def parse_script(script_path, **parser_kwargs):
+    """
+    Parses a single script, returning a ParseResult instead of raising. The description
+    is None when the script could not be parsed, and error holds the reason.
+
+    Keyword arguments, such as cache or timeout, are passed to Parser. The description
+    is plain data (see clinto.utils.to_plain_data), so it can be sent between
+    processes even if the script defines its defaults or choices.
+    """
+    try:
+        parser = Parser(script_path=script_path, **parser_kwargs)
+    except (Exception, SystemExit):
+        return ParseResult(script_path, None, traceback.format_exc())
+    if not parser.valid:
+        return ParseResult(script_path, None, parser.error)
+    return ParseResult(script_path, to_plain_data(parser.get_script_description()), "")
+
+
+def _get_executor(workers, use_threads=False):
+    if use_threads:
+        return ThreadPoolExecutor(max_workers=workers)
+    kwargs = {"max_workers": workers}
+    if sys.version_info >= (3, 11):
+        # A fresh interpreter for every script so nothing one script imports or
+        # patches leaks into the next. This is incompatible with fork.
+        kwargs["mp_context"] = multiprocessing.get_context("spawn")
+        kwargs["max_tasks_per_child"] = 1
+    return ProcessPoolExecutor(**kwargs)
+
+
+def _stop_executor(executor):
+    """
+    Shuts executor down without waiting for the scripts it is still running. Worker
+    processes are terminated; threads cannot be, and finish in the background.
+    """
+    # shutdown drops the executor's reference to its processes
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def parse_scripts(script_paths, workers=None, use_threads=False, **parser_kwargs):
+    """
+    Parses each script in script_paths in its own worker process, yielding a
+    ParseResult for each one as soon as it finishes. Results are therefore not in the
+    order of script_paths. Closing the generator early terminates the scripts still
+    being parsed.
+
+    :param workers: The number of worker processes, defaults to the number of CPUs.
+    :param use_threads: Use a pool of threads instead. Extraction is thread-safe, and
+      threads avoid the cost of starting an interpreter per script, but scripts are no
+      longer isolated from each other unless a timeout or resource limit is also given.
+    :param parser_kwargs: Passed to the Parser of each script, e.g. a SpecCache shared by
+      the workers or the timeout applied to each script.
+    """
+    workers = workers or os.cpu_count() or 1
+    executor = _get_executor(workers, use_threads=use_threads)
+    # Bound the number of queued scripts so huge (or lazy) inputs are not all
+    # submitted up front
+    max_pending = workers * 2
+    script_paths = iter(script_paths)
+    # {future: (script_path, executor, whether the executor runs only this script)}
+    pending = {}
+
+    def submit_next():
+        for script_path in script_paths:
+            future = executor.submit(parse_script, script_path, **parser_kwargs)
+            pending[future] = (script_path, executor, False)
+            return True
+        return False
+
+    def submit_alone(script_path):
+        solo_executor = _get_executor(1)
+        future = solo_executor.submit(parse_script, script_path, **parser_kwargs)
+        pending[future] = (script_path, solo_executor, True)
+
+    try:
+        while len(pending) < max_pending and submit_next():
+            pass
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                script_path, future_executor, alone = pending.pop(future)
+                if alone:
+                    future_executor.shutdown(wait=False)
+                try:
+                    yield future.result()
+                except BrokenProcessPool:
+                    if alone:
+                        # This script took down a pool of its own, e.g. by calling
+                        # os._exit
+                        yield ParseResult(script_path, None, traceback.format_exc())
+                        continue
+                    # A worker died outright, which fails every script on the pool
+                    # and not only the one responsible. Carry on with a new pool and
+                    # retry each failed script in a process of its own.
+                    if future_executor is executor:
+                        executor.shutdown(wait=False)
+                        executor = _get_executor(workers, use_threads=use_threads)
+                    submit_alone(script_path)
+                except Exception:
+                    yield ParseResult(script_path, None, traceback.format_exc())
+            while len(pending) < max_pending and submit_next():
+                pass
+    finally:
+        for future_executor in set(i[1] for i in pending.values()) | {executor}:
+            _stop_executor(future_executor)
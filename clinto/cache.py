@@ -0,0 +1,181 @@
+"""
+A persistent, content-addressed cache of script descriptions.
+
+Entries are keyed on the fingerprint of the script (its bytes and those of the local
+modules it imports, or the member metadata of a zip app), the running Python version,
+the clinto version and the Parser options that change the description, so an unchanged
+script can be described without being executed again.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+from .fingerprint import fingerprint_script
+from .utils import dump_json, to_plain_data
+from .version import PY_FULL_VERSION, __version__
+
+CACHE_SUFFIX = ".spec"
+
+
+def get_script_key(script_path):
+    """
+    Builds the part of the cache key shared by every entry of a script.
+    """
+    key_parts = [
+        fingerprint_script(script_path),
+        ".".join(str(i) for i in PY_FULL_VERSION),
+        __version__,
+    ]
+    return hashlib.sha256("\0".join(key_parts).encode("utf-8")).hexdigest()
+
+
+def get_options_key(ignore_bad_imports=False, static=False, stub_imports=None):
+    """
+    Builds the part of the cache key for the Parser options that change the
+    description.
+    """
+    if stub_imports is True:
+        stubbed = "*"
+    else:
+        stubbed = ",".join(sorted(set(stub_imports or ())))
+    key_parts = [str(bool(ignore_bad_imports)), str(bool(static)), stubbed]
+    return hashlib.sha256("\0".join(key_parts).encode("utf-8")).hexdigest()
+
+
+def get_cache_key(script_path, **options):
+    """
+    Builds the cache key for a script. Anything that may change the extracted
+    description is part of the key. options are the Parser options ignore_bad_imports,
+    static and stub_imports.
+    """
+    return "{0}-{1}".format(get_script_key(script_path), get_options_key(**options))
+
+
+class SpecCache(object):
+    """
+    Stores script descriptions on disk, as one JSON file per entry, so reading the
+    cache never runs code. Sets in a description, such as param_action, are read back
+    as lists. When the cache grows beyond max_size bytes or max_entries entries, the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir, max_size=64 * 1024 * 1024, max_entries=None):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.max_entries = max_entries
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_key(self, script_path, **options):
+        return get_cache_key(script_path, **options)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, "{0}{1}".format(key, CACHE_SUFFIX))
+
+    def get(self, key):
+        """
+        Returns the cached description for key, or None if there is no usable entry.
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                description = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # A truncated or otherwise unreadable entry is treated as a miss
+            self._remove(entry_path)
+            return None
+        # Bump the modification time so eviction is least-recently-used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return description
+
+    def set(self, key, description):
+        """
+        Stores description, as plain data, under key. Returns whether it was stored.
+        A failed write only means a later miss, so it is not raised.
+        """
+        entry_path = self._entry_path(key)
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        except OSError:
+            return False
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                # Stored as the description's JSON would be, with objects defined by
+                # the script written as their string representations
+                dump_json(to_plain_data(description), f)
+            os.replace(temp_path, entry_path)
+        except Exception:
+            self._remove(temp_path)
+            return False
+        self.evict(keep=entry_path)
+        return True
+
+    def invalidate(self, script_path=None, key=None):
+        """
+        Removes the entries for a given script (under any Parser options) or for a
+        specific key. Returns the number of entries removed.
+        """
+        paths = set()
+        if key is not None:
+            paths.add(self._entry_path(key))
+        if script_path is not None:
+            prefix = "{0}-".format(get_script_key(script_path))
+            paths.update(
+                path
+                for path, _ in self._entries()
+                if os.path.basename(path).startswith(prefix)
+            )
+        return sum(self._remove(i) for i in paths)
+
+    def clear(self):
+        return sum(self._remove(path) for path, _ in self._entries())
+
+    def evict(self, keep=None):
+        """
+        Removes least recently used entries until the cache is within its limits. The
+        entry at the path given by keep is never evicted.
+        """
+        entries = self._entries()
+        total_size = sum(stat.st_size for _, stat in entries)
+        entry_count = len(entries)
+        # Oldest entries first
+        candidates = sorted(
+            (i for i in entries if i[0] != keep), key=lambda x: x[1].st_mtime_ns
+        )
+        while candidates and (
+            (self.max_size is not None and total_size > self.max_size)
+            or (self.max_entries is not None and entry_count > self.max_entries)
+        ):
+            path, stat = candidates.pop(0)
+            self._remove(path)
+            total_size -= stat.st_size
+            entry_count -= 1
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(CACHE_SUFFIX):
+                    continue
+                try:
+                    entries.append((entry.path, entry.stat()))
+                except FileNotFoundError:
+                    continue
+        return entries
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def __len__(self):
+        return len(self._entries())
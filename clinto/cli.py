@@ -0,0 +1,160 @@
+"""
+Generate specs for many scripts at once, writing one JSON object per line.
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+from .batch import parse_scripts
+from .cache import SpecCache
+from .triage import NOT_CLI, triage_scripts
+from .utils import dump_json, redirect_script_output
+
+SCRIPT_EXTENSIONS = (".py", ".zip")
+
+
+def find_scripts(paths):
+    """
+    Expands files, directories (searched recursively for scripts) and glob patterns
+    into script paths. Each script is returned once, in the order it was found.
+    """
+    seen = set()
+    for path in paths:
+        if os.path.isdir(path):
+            matches = []
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                matches.extend(
+                    os.path.join(root, i)
+                    for i in sorted(files)
+                    if i.endswith(SCRIPT_EXTENSIONS)
+                )
+        elif os.path.exists(path):
+            matches = [path]
+        else:
+            matches = sorted(
+                i for i in glob.glob(path, recursive=True) if os.path.isfile(i)
+            )
+            if not matches:
+                sys.stderr.write("No scripts found for {0}\n".format(path))
+        for match in matches:
+            real_path = os.path.realpath(match)
+            if real_path not in seen:
+                seen.add(real_path)
+                yield match
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="clinto",
+        description="Extract specs from argparse and docopt scripts as JSON lines.",
+    )
+    parser.add_argument(
+        "paths", nargs="+", help="Scripts, directories of scripts or glob patterns"
+    )
+    parser.add_argument(
+        "-o", "--output", help="The file to write to, defaults to stdout"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="The number of worker processes, defaults to the number of CPUs",
+    )
+    parser.add_argument("--cache-dir", help="Cache specs in this directory")
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Seconds to allow each script before giving up on it",
+    )
+    parser.add_argument(
+        "--ignore-bad-imports",
+        action="store_true",
+        help="Ignore imports that cannot be resolved when parsing the script source",
+    )
+    parser.add_argument(
+        "--triage",
+        action="store_true",
+        help="Skip scripts that do not look like CLIs, without running them",
+    )
+    parser.add_argument(
+        "--triage-report",
+        action="store_true",
+        help="Write the triage kind and confidence of each script instead of its spec",
+    )
+    return parser
+
+
+def write_results(results, output):
+    """
+    Writes a line for each ParseResult to output, returning the number of failures.
+    """
+    failures = 0
+    for result in results:
+        if result.description is None:
+            failures += 1
+        dump_json(
+            {
+                "path": result.path,
+                "description": result.description,
+                "error": result.error,
+            },
+            output,
+        )
+        output.write("\n")
+        output.flush()
+    return failures
+
+
+def write_triage(results, output):
+    """
+    Writes a line for each TriageResult to output.
+    """
+    for result in results:
+        dump_json(
+            {
+                "path": result.path,
+                "kind": result.kind,
+                "confidence": result.confidence,
+                "signals": result.signals,
+            },
+            output,
+        )
+        output.write("\n")
+    output.flush()
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+
+    parser_kwargs = {"ignore_bad_imports": args.ignore_bad_imports}
+    if args.cache_dir:
+        parser_kwargs["cache"] = SpecCache(args.cache_dir)
+    if args.timeout is not None:
+        parser_kwargs["timeout"] = args.timeout
+
+    script_paths = find_scripts(args.paths)
+    if args.triage_report:
+        if args.output:
+            with open(args.output, "w") as output:
+                write_triage(triage_scripts(script_paths), output)
+        else:
+            write_triage(triage_scripts(script_paths), sys.stdout)
+        return 0
+    if args.triage:
+        script_paths = (
+            i.path for i in triage_scripts(script_paths) if i.kind != NOT_CLI
+        )
+
+    results = parse_scripts(script_paths, workers=args.jobs, **parser_kwargs)
+    if args.output:
+        with open(args.output, "w") as output:
+            failures = write_results(results, output)
+    else:
+        with redirect_script_output() as output:
+            failures = write_results(results, output)
+    return 1 if failures else 0
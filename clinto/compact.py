@@ -0,0 +1,108 @@
+"""
+A compact, read-only form of script descriptions for holding many of them in memory.
+
+Each node dict becomes a CompactNode, which stores its values in a tuple and shares the
+keys with every other node of the same shape. Strings are interned, so repeated models,
+types and group titles are stored once, and lists and sets become tuples and frozensets.
+"""
+
+import sys
+from collections.abc import Mapping
+
+EMPTY_FROZENSET = frozenset()
+
+# Layouts by their tuple of keys, shared by every node with those keys
+_layouts = {}
+
+
+class Layout(object):
+    __slots__ = ("keys", "index")
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.index = dict((key, i) for i, key in enumerate(keys))
+
+
+def get_layout(keys):
+    keys = tuple(keys)
+    layout = _layouts.get(keys)
+    if layout is None:
+        layout = _layouts.setdefault(keys, Layout(keys))
+    return layout
+
+
+class CompactNode(Mapping):
+    """
+    A read-only mapping standing in for a dict of a description. Use dict(node), or
+    to_description, to get a modifiable copy.
+    """
+
+    __slots__ = ("_layout", "_values")
+
+    def __init__(self, items):
+        keys = []
+        values = []
+        for key, value in items:
+            keys.append(compact(key))
+            values.append(compact(value))
+        self._layout = get_layout(keys)
+        self._values = tuple(values)
+
+    def __getitem__(self, key):
+        try:
+            return self._values[self._layout.index[key]]
+        except KeyError:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._layout.keys)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._layout.index
+
+    def __repr__(self):
+        return "CompactNode({0!r})".format(dict(self))
+
+
+EMPTY_NODE = CompactNode(())
+
+
+def compact(value):
+    """
+    Returns the compact form of a description, or any value within one.
+    """
+    if type(value) is str:
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return CompactNode(value.items()) if value else EMPTY_NODE
+    if isinstance(value, (list, tuple)):
+        return tuple(compact(i) for i in value)
+    if isinstance(value, (set, frozenset)):
+        # Empty frozensets are not shared by Python itself
+        return frozenset(compact(i) for i in value) if value else EMPTY_FROZENSET
+    return value
+
+
+def from_description(description):
+    """
+    Compacts a description, as returned by Parser.get_script_description.
+    """
+    return compact(description)
+
+
+def to_description(value):
+    """
+    Expands a compacted description back into dicts, lists and sets. Tuples and
+    frozensets in the original description come back as lists and sets, as they would
+    through JSON. The order of inputs and groups is kept.
+    """
+    if isinstance(value, CompactNode):
+        return dict((key, to_description(i)) for key, i in value.items())
+    if isinstance(value, tuple):
+        return [to_description(i) for i in value]
+    if isinstance(value, frozenset):
+        return set(to_description(i) for i in value)
+    return value
@@ -0,0 +1,138 @@
+"""
+Structural differences between two descriptions of a script, so stored parameters can
+be updated in place rather than recreated.
+"""
+
+from collections import OrderedDict, namedtuple
+
+from .compact import compact
+
+Changes = namedtuple("Changes", ["added", "removed", "modified"])
+
+
+class SpecDiff(
+    namedtuple("SpecDiff", ["script", "subparsers", "groups", "parameters"])
+):
+    """
+    The changes between two descriptions, each as added, removed and modified:
+
+    - script: top level entries such as the description or version. Modified entries
+      map to (old, new).
+    - subparsers: lists of parser names. Modified parsers have any group or parameter
+      change.
+    - groups: lists of (parser name, group title). Modified groups contain different
+      parameters, or the same ones in a different order.
+    - parameters: keyed on (parser name, param), or (parser name, name) for
+      positional arguments. Added and removed map to the parameter, and modified to a
+      dict of {attribute: (old, new)}. The group of a parameter is compared as a
+      "group" attribute.
+
+    Either description may be compacted (see clinto.compact). Missing entries compare
+    as None. If a parser has several parameters with the same key, the repeats are
+    keyed with a third element counting them from 1.
+    """
+
+    __slots__ = ()
+
+    @property
+    def changed(self):
+        return any(any(changes) for changes in self)
+
+
+def get_parameter_key(parser_name, node):
+    return (parser_name, node.get("param") or node.get("name"))
+
+
+def index_parameters(description):
+    """
+    Returns an OrderedDict of {key: (group title, node)} for the parameters of
+    description, and an OrderedDict of {(parser name, group title): [keys]}.
+    """
+    parameters = OrderedDict()
+    groups = OrderedDict()
+    for parser_name, parser_groups in (description.get("inputs") or {}).items():
+        for group in parser_groups:
+            group_keys = groups.setdefault((parser_name, group["group"]), [])
+            for node in group["nodes"]:
+                key = get_parameter_key(parser_name, node)
+                repeat = 0
+                while key in parameters:
+                    repeat += 1
+                    key = get_parameter_key(parser_name, node) + (repeat,)
+                parameters[key] = (group["group"], node)
+                group_keys.append(key)
+    return parameters, groups
+
+
+def diff_mappings(old, new):
+    changes = OrderedDict()
+    for key in list(old) + [i for i in new if i not in old]:
+        old_value, new_value = old.get(key), new.get(key)
+        # Compare compacted values so compacted and plain descriptions can be mixed
+        if old_value != new_value and compact(old_value) != compact(new_value):
+            changes[key] = (old_value, new_value)
+    return changes
+
+
+def diff_specs(old, new):
+    """
+    Compares two descriptions, as returned by Parser.get_script_description, and
+    returns a SpecDiff of the changes from old to new.
+    """
+    old_inputs, new_inputs = old.get("inputs") or {}, new.get("inputs") or {}
+    old_parameters, old_groups = index_parameters(old)
+    new_parameters, new_groups = index_parameters(new)
+
+    script = Changes(
+        OrderedDict((k, v) for k, v in new.items() if k != "inputs" and k not in old),
+        OrderedDict((k, v) for k, v in old.items() if k != "inputs" and k not in new),
+        OrderedDict(
+            (k, v)
+            for k, v in diff_mappings(old, new).items()
+            if k != "inputs" and k in old and k in new
+        ),
+    )
+
+    added = OrderedDict(
+        (key, node)
+        for key, (_, node) in new_parameters.items()
+        if key not in old_parameters
+    )
+    removed = OrderedDict(
+        (key, node)
+        for key, (_, node) in old_parameters.items()
+        if key not in new_parameters
+    )
+    modified = OrderedDict()
+    for key, (old_group, old_node) in old_parameters.items():
+        if key not in new_parameters:
+            continue
+        new_group, new_node = new_parameters[key]
+        node_changes = diff_mappings(
+            dict(old_node, group=old_group), dict(new_node, group=new_group)
+        )
+        if node_changes:
+            modified[key] = node_changes
+    parameters = Changes(added, removed, modified)
+
+    groups = Changes(
+        [i for i in new_groups if i not in old_groups],
+        [i for i in old_groups if i not in new_groups],
+        [i for i in old_groups if i in new_groups and old_groups[i] != new_groups[i]],
+    )
+
+    changed_parsers = set(
+        key[0]
+        for key in list(parameters.added)
+        + list(parameters.removed)
+        + list(parameters.modified)
+    )
+    changed_parsers.update(
+        key[0] for key in groups.added + groups.removed + groups.modified
+    )
+    subparsers = Changes(
+        [i for i in new_inputs if i not in old_inputs],
+        [i for i in old_inputs if i not in new_inputs],
+        [i for i in old_inputs if i in new_inputs and i in changed_parsers],
+    )
+    return SpecDiff(script, subparsers, groups, parameters)
@@ -0,0 +1,131 @@
+"""
+Fingerprint a script together with the local modules it imports, so that a change to a
+sibling module defining the parser changes the fingerprint too.
+"""
+
+import ast
+import hashlib
+import os
+import zipfile
+
+
+def resolve_module(base_dir, module_name):
+    """
+    Returns the files under base_dir making up the dotted module_name, e.g.
+    pkg/__init__.py and pkg/mod.py for pkg.mod. A trailing name that is not a module
+    (such as a function imported from it) is ignored.
+    """
+    files = []
+    current_dir = base_dir
+    for part in module_name.split("."):
+        module_path = os.path.join(current_dir, "{0}.py".format(part))
+        package_dir = os.path.join(current_dir, part)
+        if os.path.isfile(module_path):
+            files.append(module_path)
+            break
+        if not os.path.isdir(package_dir):
+            break
+        init_path = os.path.join(package_dir, "__init__.py")
+        if os.path.isfile(init_path):
+            files.append(init_path)
+        current_dir = package_dir
+    return files
+
+
+def find_local_imports(file_path, source, script_dir):
+    """
+    Returns the files of the modules imported by source, the contents of file_path,
+    that are found in script_dir (for absolute imports) or relative to file_path.
+    Imports anywhere in the file count, including those inside functions.
+    """
+    try:
+        tree = ast.parse(source, filename=file_path)
+    except (SyntaxError, ValueError):
+        return []
+
+    files = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                files.extend(resolve_module(script_dir, alias.name))
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base_dir = os.path.dirname(file_path)
+                for _ in range(node.level - 1):
+                    base_dir = os.path.dirname(base_dir)
+            else:
+                base_dir = script_dir
+            # Each imported name may be a submodule
+            module_names = [
+                "{0}.{1}".format(node.module, alias.name) if node.module else alias.name
+                for alias in node.names
+            ]
+            for module_name in module_names:
+                files.extend(resolve_module(base_dir, module_name))
+    # Keep the first occurrence of each file
+    return list(dict.fromkeys(files))
+
+
+def fingerprint_zip(zip_path):
+    """
+    Fingerprints a zip app from the names, CRCs and sizes of its members, without
+    decompressing them.
+    """
+    digest = hashlib.sha256()
+    with zipfile.ZipFile(zip_path) as archive:
+        for info in sorted(archive.infolist(), key=lambda x: x.filename):
+            digest.update(
+                "{0}\0{1}\0{2}\n".format(
+                    info.filename, info.CRC, info.file_size
+                ).encode("utf-8", "surrogateescape")
+            )
+    return digest.hexdigest()
+
+
+def find_script_files(script_path):
+    """
+    Returns the script at script_path, followed by the local modules it imports,
+    directly or through other local modules. A zip app is returned on its own.
+    """
+    if zipfile.is_zipfile(script_path):
+        return [script_path]
+
+    script_path = os.path.abspath(script_path)
+    script_dir = os.path.dirname(script_path)
+    files = []
+    pending = [script_path]
+    while pending:
+        file_path = pending.pop()
+        if file_path in files:
+            continue
+        files.append(file_path)
+        with open(file_path, "rb") as f:
+            source = f.read()
+        pending.extend(find_local_imports(file_path, source, script_dir))
+    return files
+
+
+def fingerprint_script(script_path):
+    """
+    Returns a hex digest of the script at script_path and every local module it
+    imports, directly or through other local modules. Zip apps are fingerprinted from
+    the metadata of all their members.
+    """
+    if zipfile.is_zipfile(script_path):
+        return fingerprint_zip(script_path)
+
+    files = find_script_files(script_path)
+    script_dir = os.path.dirname(files[0])
+    file_hashes = []
+    for file_path in files:
+        with open(file_path, "rb") as f:
+            file_hash = hashlib.sha256(f.read()).hexdigest()
+        file_hashes.append((os.path.relpath(file_path, script_dir), file_hash))
+
+    # The script itself comes first, then its modules in a stable order
+    digest = hashlib.sha256()
+    for name, file_hash in file_hashes[:1] + sorted(file_hashes[1:]):
+        digest.update(
+            "{0}\0{1}\n".format(name, file_hash).encode("utf-8", "surrogateescape")
+        )
+    return digest.hexdigest()
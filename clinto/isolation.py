@@ -0,0 +1,124 @@
+"""
+Run script extraction in a child process, bounded by a wall-clock timeout and
+optional CPU time and address space limits.
+"""
+
+import multiprocessing
+import signal
+import traceback
+
+try:
+    import resource
+except ImportError:
+    # Resource limits are not available on Windows, only the timeout applies there
+    resource = None
+
+from .utils import to_plain_data
+
+ISOLATED_TECHNIQUE = "isolated-execution"
+
+
+def format_error(error):
+    return "Unable to parse script. Errors encountered:\n Technique: {0}\nError: {1}\n".format(
+        ISOLATED_TECHNIQUE, error
+    )
+
+
+def set_resource_limits(cpu_time_limit=None, memory_limit=None):
+    if resource is None:
+        return
+    if cpu_time_limit is not None:
+        # The soft limit sends SIGXCPU, the hard limit a SIGKILL a second later
+        resource.setrlimit(
+            resource.RLIMIT_CPU, (int(cpu_time_limit), int(cpu_time_limit) + 1)
+        )
+    if memory_limit is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (int(memory_limit), int(memory_limit)))
+
+
+def _extract(conn, script_path, parser_kwargs, cpu_time_limit, memory_limit):
+    from .parser import Parser
+
+    try:
+        set_resource_limits(cpu_time_limit=cpu_time_limit, memory_limit=memory_limit)
+        parser = Parser(script_path=script_path, **parser_kwargs)
+        # Objects defined by the script cannot be unpickled in the parent
+        result = (to_plain_data(parser.get_script_description()), parser.error)
+    except MemoryError:
+        result = (None, format_error("MemoryError\n"))
+    except BaseException:
+        result = (None, format_error(traceback.format_exc()))
+    try:
+        conn.send(result)
+    except Exception:
+        conn.send((None, format_error(traceback.format_exc())))
+    finally:
+        conn.close()
+
+
+def run_isolated(
+    script_path, timeout=None, cpu_time_limit=None, memory_limit=None, **parser_kwargs
+):
+    """
+    Extracts the description of script_path in a child process. Any other keyword
+    arguments are passed to the Parser in the child.
+
+    :param timeout: Seconds of wall-clock time before the child is killed.
+    :param cpu_time_limit: Seconds of CPU time the child may use.
+    :param memory_limit: Bytes of address space the child may use.
+    :return: A tuple of (description, error). description is None on failure.
+    """
+    context = multiprocessing.get_context()
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_extract,
+        args=(child_conn, script_path, parser_kwargs, cpu_time_limit, memory_limit),
+    )
+    process.start()
+    child_conn.close()
+
+    try:
+        if not parent_conn.poll(timeout):
+            return None, format_error(
+                "Script did not finish within the {0} second timeout\n".format(timeout)
+            )
+        try:
+            description, error = parent_conn.recv()
+        except EOFError:
+            # The child died without reporting back
+            process.join()
+            return None, format_error(_describe_exit(process.exitcode, cpu_time_limit))
+    finally:
+        parent_conn.close()
+        if process.is_alive():
+            process.kill()
+        process.join()
+
+    if (
+        description is None
+        and memory_limit is not None
+        and "MemoryError" in (error or "")
+    ):
+        error = (
+            format_error(
+                "Script exceeded the address space limit of {0} bytes\n".format(
+                    memory_limit
+                )
+            )
+            + error
+        )
+    return description, error
+
+
+def _describe_exit(exitcode, cpu_time_limit):
+    if exitcode is not None and exitcode < 0:
+        sig = -exitcode
+        if cpu_time_limit is not None and sig in (
+            getattr(signal, "SIGXCPU", None),
+            getattr(signal, "SIGKILL", None),
+        ):
+            return "Script exceeded the CPU time limit of {0} seconds\n".format(
+                cpu_time_limit
+            )
+        return "Script was terminated by signal {0}\n".format(sig)
+    return "Script exited with code {0}\n".format(exitcode)
@@ -1,57 +1,235 @@
+import contextlib
+import json
 import os
+import shutil
+import sys
 import tempfile
 import zipfile
 
+from .isolation import run_isolated
 from .parsers import ArgParseParser, DocOptParser
+from .parsers.stubs import is_stdlib_module
+from .utils import SpecJSONEncoder, dump_json, recorded_imports, to_plain_data
 
 parsers = [ArgParseParser, DocOptParser]
 
 
+def read_script(script_path):
+    """
+    Returns the path and source of the script to parse. For a zip app this is its
+    __main__.py, read straight from the archive. The path is then inside of the archive,
+    e.g. app.zip/__main__.py, so the archive itself is added to sys.path during
+    extraction and its modules are imported through zipimport without extracting them.
+    Apps that cannot be parsed this way are parsed again from a temporary extraction.
+    """
+    if zipfile.is_zipfile(script_path):
+        with zipfile.ZipFile(script_path) as zip:
+            script_source = zip.read("__main__.py").decode("utf-8")
+        return os.path.join(script_path, "__main__.py"), script_source
+
+    with open(script_path, "r") as f:
+        return script_path, f.read()
+
+
+def find_parser(script_path, script_source, **parser_kwargs):
+    """
+    Tries the parser backends on the script, most likely first, returning the first
+    valid one and an empty error, or None and the error of the most likely backend.
+    Keyword arguments are passed to the backends.
+    """
+    # Score each backend from the source alone so only the backends we need are
+    # instantiated, since instantiating one executes the script.
+    scored_parsers = sorted(
+        [
+            (
+                pc.calculate_score(
+                    script_path=script_path, script_source=script_source
+                ),
+                pc,
+            )
+            for pc in parsers
+        ],
+        key=lambda x: x[0],
+        reverse=True,
+    )
+
+    attempted = []
+    for score, pc in scored_parsers:
+        if not score:
+            continue
+        po = pc(script_path=script_path, script_source=script_source, **parser_kwargs)
+        if po.is_valid:
+            # It worked
+            return po, ""
+        attempted.append(po)
+    # No parser found, fetch the error from the highest scoring parser for reporting
+    if attempted:
+        return None, attempted[0].error
+    return None, "Unable to find a parser for {0}".format(script_path)
+
+
 class Parser(object):
-    def __init__(self, script_path=None, script_name=None, ignore_bad_imports=False):
+    def __init__(
+        self,
+        script_path=None,
+        script_name=None,
+        ignore_bad_imports=False,
+        cache=None,
+        static=False,
+        stub_imports=None,
+        detached=False,
+        isolated=False,
+        timeout=None,
+        cpu_time_limit=None,
+        memory_limit=None,
+    ):
+        """
+        :param cache: An optional SpecCache to store and look up descriptions in.
+        :param static: Try building argparse parsers from the AST before executing the
+          script. See clinto.ast.source_parser.build_argparse_parser.
+        :param stub_imports: Serve stub modules instead of importing these top level
+          packages while extracting, or True to stub everything outside of the standard
+          library and the script's directory. See clinto.parsers.stubs.
+        :param detached: Keep only the description, as plain data, and release the
+          parser, the script's module and any modules imported while extracting it
+          from sys.modules. This keeps long running processes from growing with every
+          parse. Only imports made by the extracting thread are removed, and never
+          those of the standard library. Note that some C extensions cannot be
+          imported again once removed.
+        :param isolated: Extract the description in a child process. This is implied
+          by any of timeout (seconds of wall-clock time), cpu_time_limit (seconds of
+          CPU time) and memory_limit (bytes of address space).
+        """
         self.parser = None
         self._error = ""
+        # A description restored from the cache or detached from the parser, used in
+        # place of a parser
+        self._description = None
+        self._json = None
 
-        if zipfile.is_zipfile(script_path):
-            temp_dir = tempfile.mkdtemp()
-            with zipfile.ZipFile(script_path) as zip:
-                zip.extractall(temp_dir)
-                script_path = os.path.join(temp_dir, "__main__.py")
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.get_key(
+                script_path,
+                ignore_bad_imports=ignore_bad_imports,
+                static=static,
+                stub_imports=stub_imports,
+            )
 
-        with open(script_path, "r") as f:
-            script_source = f.read()
+        original_script_path = script_path
+        script_path, script_source = read_script(script_path)
 
-        parser_obj = [
-            pc(
-                script_path=script_path,
-                script_source=script_source,
+        if cache_key is not None:
+            description = cache.get(cache_key)
+            if description is not None:
+                # The key is content based, so the same script may live somewhere else now
+                description["path"] = script_path
+                description["name"] = os.path.splitext(os.path.basename(script_path))[0]
+                self._description = description
+                return
+
+        if isolated or any(
+            i is not None for i in (timeout, cpu_time_limit, memory_limit)
+        ):
+            self._description, self._error = run_isolated(
+                original_script_path,
+                timeout=timeout,
+                cpu_time_limit=cpu_time_limit,
+                memory_limit=memory_limit,
                 ignore_bad_imports=ignore_bad_imports,
+                static=static,
+                stub_imports=stub_imports,
             )
-            for pc in parsers
-        ]
-        parser_obj = sorted(parser_obj, key=lambda x: x.score, reverse=True)
-
-        for po in parser_obj:
-            if po.is_valid:
-                # It worked
-                self.parser = po
-                break
-        else:
-            # No parser found, fetch the error from the highest scoring parser for reporting
-            self._error = parser_obj[0].error
+            if cache_key is not None and self._description is not None:
+                cache.set(cache_key, self._description)
+            return
+
+        parser_kwargs = {
+            "ignore_bad_imports": ignore_bad_imports,
+            "static": static,
+            "stub_imports": stub_imports,
+        }
+        imports = recorded_imports() if detached else contextlib.nullcontext()
+        with imports as imported:
+            self.parser, self._error = find_parser(
+                script_path, script_source, **parser_kwargs
+            )
+            if self.parser is None and script_path != original_script_path:
+                self._parse_extracted(original_script_path, script_path, parser_kwargs)
+
+        if detached:
+            self._detach(imported)
+
+        if cache_key is not None and self.valid:
+            cache.set(cache_key, self.get_script_description())
+
+    def _parse_extracted(self, zip_path, script_path, parser_kwargs):
+        """
+        Parses the zip app at zip_path from a temporary extraction of it, for apps
+        whose members need to be real files, e.g. data opened relative to __file__.
+        The description keeps script_path, the path inside of the archive.
+        """
+        temp_dir = tempfile.mkdtemp()
+        try:
+            with zipfile.ZipFile(zip_path) as zip:
+                zip.extractall(temp_dir)
+            extracted_path = os.path.join(temp_dir, "__main__.py")
+            with open(extracted_path, "r") as f:
+                script_source = f.read()
+            parser, _ = find_parser(extracted_path, script_source, **parser_kwargs)
+            if parser is None:
+                # Report the error from parsing in place
+                return
+            description = to_plain_data(parser.get_script_description())
+            description["path"] = script_path
+            description["name"] = os.path.splitext(os.path.basename(script_path))[0]
+            self._description = description
+            self._error = parser.error
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _detach(self, imported):
+        if self.parser is not None:
+            self._description = to_plain_data(self.parser.get_script_description())
+            self._error = self.parser.error
+            self.parser = None
+        for name in imported:
+            if not is_stdlib_module(name.partition(".")[0]):
+                sys.modules.pop(name, None)
 
     def get_script_description(self):
+        if self._description is not None:
+            return self._description
         if self.parser:
             return self.parser.get_script_description()
 
     @property
     def json(self):
+        if self._description is not None:
+            if self._json is None:
+                self._json = json.dumps(self._description, cls=SpecJSONEncoder)
+            return self._json
         if self.parser:
             return self.parser.json
         return {}
 
+    def dump_json(self, fp):
+        """
+        Writes the description as JSON to the file-like object fp, without building
+        the whole document in memory first.
+        """
+        if self._description is not None:
+            if self._json is not None:
+                fp.write(self._json)
+            else:
+                dump_json(self._description, fp)
+        elif self.parser:
+            self.parser.dump_json(fp)
+
     @property
     def valid(self):
+        if self._description is not None:
+            return True
         if self.parser:
             return self.parser.is_valid
         return False
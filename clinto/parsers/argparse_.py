@@ -4,22 +4,22 @@ import io
 import json
 import os
 import sys
-import tempfile
 import traceback
 import types
-from collections import OrderedDict
+import weakref
+from collections import ChainMap, OrderedDict
 from itertools import chain
 
 from ..ast import source_parser
-from ..utils import is_upload, expand_iterable
+from ..utils import describe_truncation, expand_iterable, is_upload, truncate_value
 from .base import (
     BaseParser,
-    parse_args_monkeypatch,
     ClintoArgumentParserException,
+    intercepted_parse_args,
     load_module_from_path,
-    update_dict_copy,
 )
 from .compat import ParserExceptions
+from . import constants
 from .constants import SPECIFY_EVERY_PARAM
 
 
@@ -68,7 +68,14 @@ GLOBAL_ATTR_KWARGS = {
     "help": {"action_name": "help"},
     "param": {"callback": lambda x: x.option_strings[0] if x.option_strings else ""},
     "param_action": {"callback": lambda x: get_parameter_action(x)},
-    "choices": {"callback": lambda x: expand_iterable(x.choices)},
+    # One choice past the limit is kept, so bound_values can tell choices without a
+    # length (e.g. a generator) were truncated
+    "choices": {
+        "callback": lambda x: expand_iterable(
+            x.choices,
+            limit=None if constants.MAX_CHOICES is None else constants.MAX_CHOICES + 1,
+        )
+    },
     "choice_limit": {"callback": lambda x: CHOICE_LIMIT_MAP.get(x.nargs, x.nargs)},
 }
 
@@ -115,8 +122,9 @@ TYPE_FIELDS = {
             **{
                 "value": None,
                 "required": {
-                    "callback": lambda x: x.required
-                    or x.default in (sys.stdout, sys.stdin)
+                    "callback": lambda x: (
+                        x.required or x.default in (sys.stdout, sys.stdin)
+                    )
                 },
                 "upload": {"callback": is_upload},
             },
@@ -143,38 +151,85 @@ TYPE_FIELDS.update(
 
 # There are cases where we can glean additional information about the form structure, e.g.
 # a StoreAction with default=True can be different than a StoreTrueAction with default=False
-ACTION_CLASS_TO_TYPE_FIELD = {
-    argparse._StoreAction: update_dict_copy(TYPE_FIELDS, {}),
-    argparse._StoreConstAction: update_dict_copy(TYPE_FIELDS, {}),
-    argparse._StoreTrueAction: update_dict_copy(
-        TYPE_FIELDS,
-        {
-            None: {
-                "model": "BooleanField",
-                "type": "checkbox",
-                "nullcheck": lambda x: x.default is None,
-                "attr_kwargs": update_dict_copy(
-                    GLOBAL_ATTR_KWARGS,
-                    {"checked": {"callback": lambda x: x.default}, "value": None},
-                ),
-            }
-        },
+# Each entry overlays TYPE_FIELDS, so types registered there later are seen here too.
+CHECKBOX_FIELD = {
+    "model": "BooleanField",
+    "type": "checkbox",
+    "nullcheck": lambda x: x.default is None,
+    "attr_kwargs": ChainMap(
+        {"checked": {"callback": lambda x: x.default}, "value": None},
+        GLOBAL_ATTR_KWARGS,
     ),
-    argparse._StoreFalseAction: update_dict_copy(
-        TYPE_FIELDS,
+}
+ACTION_CLASS_TO_TYPE_FIELD = {
+    argparse._StoreAction: ChainMap({}, TYPE_FIELDS),
+    argparse._StoreConstAction: ChainMap({}, TYPE_FIELDS),
+    argparse._StoreTrueAction: ChainMap({None: CHECKBOX_FIELD}, TYPE_FIELDS),
+    argparse._StoreFalseAction: ChainMap({None: CHECKBOX_FIELD}, TYPE_FIELDS),
+}
+
+# Field types found by searching the type fields, as {type class: {action class: field
+# type}}. The keys are weak, so classes defined by scripts are not kept alive by it.
+_field_type_cache = weakref.WeakKeyDictionary()
+
+
+def register_type_field(type_class, field_type, action_class=None):
+    """
+    Describes arguments whose type is type_class, or an instance of it, with
+    field_type. This is a dict with "model" and "type" entries, and optionally
+    "nullcheck" and "attr_kwargs" (see TYPE_FIELDS).
+
+    :param action_class: Only use field_type for actions of this class.
+    """
+    field_type = dict(
         {
-            None: {
-                "model": "BooleanField",
-                "type": "checkbox",
-                "nullcheck": lambda x: x.default is None,
-                "attr_kwargs": update_dict_copy(
-                    GLOBAL_ATTR_KWARGS,
-                    {"checked": {"callback": lambda x: x.default}, "value": None},
-                ),
-            }
+            "nullcheck": lambda x: x.default is None,
+            "attr_kwargs": GLOBAL_ATTR_KWARGS,
         },
-    ),
-}
+        **field_type,
+    )
+    if action_class is None:
+        fields = TYPE_FIELDS
+    else:
+        fields = ACTION_CLASS_TO_TYPE_FIELD.setdefault(
+            action_class, ChainMap({}, TYPE_FIELDS)
+        )
+    fields[type_class] = field_type
+    _field_type_cache.clear()
+
+
+def get_field_type(action):
+    """
+    Returns the field type describing action, or None if it is ambiguous.
+    """
+    fields = ACTION_CLASS_TO_TYPE_FIELD.get(type(action), TYPE_FIELDS)
+    field_type = fields.get(action.type)
+    if field_type is not None:
+        return field_type
+
+    # Which field type matches only depends on the class of action.type from here on
+    type_class = type(action.type)
+    try:
+        return _field_type_cache[type_class][type(action)]
+    except KeyError:
+        pass
+    field_types = [
+        i for i in fields.keys() if i is not None and issubclass(type(action.type), i)
+    ]
+    if len(field_types) > 1:
+        field_types = [
+            i for i in fields.keys() if i is not None and isinstance(action.type, i)
+        ]
+    if len(field_types) == 1:
+        field_type = fields[field_types[0]]
+    if not field_types:
+        # We cannot ascertain the type, but if it is a callable. Assign it to a charfield by default
+        if callable(action.type):
+            field_type = fields[types.FunctionType]
+    _field_type_cache.setdefault(type_class, weakref.WeakKeyDictionary())[
+        type(action)
+    ] = field_type
+    return field_type
 
 
 class ArgParseNode(object):
@@ -182,27 +237,10 @@ class ArgParseNode(object):
     This class takes an argument parser entry and assigns it to a Build spec
     """
 
+    __slots__ = ("node_attrs",)
+
     def __init__(self, action=None, mutex_group=None):
-        fields = ACTION_CLASS_TO_TYPE_FIELD.get(type(action), TYPE_FIELDS)
-        field_type = fields.get(action.type)
-        if field_type is None:
-            field_types = [
-                i
-                for i in fields.keys()
-                if i is not None and issubclass(type(action.type), i)
-            ]
-            if len(field_types) > 1:
-                field_types = [
-                    i
-                    for i in fields.keys()
-                    if i is not None and isinstance(action.type, i)
-                ]
-            if len(field_types) == 1:
-                field_type = fields[field_types[0]]
-            if not field_types:
-                # We cannot ascertain the type, but if it is a callable. Assign it to a charfield by default
-                if callable(action.type):
-                    field_type = fields[types.FunctionType]
+        field_type = get_field_type(action)
         self.node_attrs = dict([(i, field_type[i]) for i in GLOBAL_ATTRS])
         self.node_attrs["mutex_group"] = (
             {"id": mutex_group[0], "title": mutex_group[1]} if mutex_group else {}
@@ -217,6 +255,30 @@ class ArgParseNode(object):
                 self.node_attrs[attr] = getattr(action, attr_dict["action_name"], None)
             elif "callback" in attr_dict:
                 self.node_attrs[attr] = attr_dict["callback"](action)
+        self.bound_values(action)
+
+    def bound_values(self, action):
+        """
+        Keeps huge choices and defaults from being copied into the description. See
+        MAX_CHOICES and MAX_DEFAULT_ITEMS in constants.
+        """
+        choices = self.node_attrs.get("choices")
+        if choices is not None:
+            limit = constants.MAX_CHOICES
+            truncation = describe_truncation("choices", action.choices, limit)
+            if limit is not None and len(choices) > limit:
+                self.node_attrs["choices"] = choices[:limit]
+                # The count of choices without a length is unknown
+                truncation = truncation or {"choices_truncated": True}
+            self.node_attrs.update(truncation)
+        if "value" in self.node_attrs:
+            value = self.node_attrs["value"]
+            self.node_attrs["value"] = truncate_value(
+                value, constants.MAX_DEFAULT_ITEMS
+            )
+            self.node_attrs.update(
+                describe_truncation("value", value, constants.MAX_DEFAULT_ITEMS)
+            )
 
     @property
     def name(self):
@@ -248,46 +310,59 @@ class ArgParseNode(object):
 
 
 class ArgParseParser(BaseParser):
-    def heuristic(self):
+    @classmethod
+    def heuristic(cls, script_ext, script_source):
+        return [
+            script_ext in [".py", ".py3", ".py2"],
+            "argparse" in script_source,
+            "ArgumentParser" in script_source,
+            ".parse_args" in script_source,
+            ".add_argument" in script_source,
+        ]
+
+    @classmethod
+    def token_heuristic(cls, signals):
         return [
-            self.script_ext in [".py", ".py3", ".py2"],
-            "argparse" in self.script_source,
-            "ArgumentParser" in self.script_source,
-            ".parse_args" in self.script_source,
-            ".add_argument" in self.script_source,
+            "import:argparse" in signals,
+            "name:ArgumentParser" in signals or "attr:ArgumentParser" in signals,
+            "attr:parse_args" in signals or "attr:parse_known_args" in signals,
+            "attr:add_argument" in signals,
+            "main_guard" in signals,
         ]
 
     def extract_parser(self):
         parsers = []
-
-        # Try exception-catching first; this should always work
-        # Store prior to monkeypatch to restore
-        parse_args_unmonkey = argparse.ArgumentParser.parse_args
-        argparse.ArgumentParser.parse_args = parse_args_monkeypatch
-
         errors = {}
 
-        try:
-            exec(
-                self.script_source,
-                {
-                    "argparse": argparse,
-                    "__name__": "__main__",
-                    "__file__": self.script_path,
-                },
-            )
-        except ClintoArgumentParserException as e:
-            # Catch the generated exception, passing the ArgumentParser object
-            parsers.append(e.parser)
-        except ParserExceptions:
-            sys.stderr.write(
-                "Error while trying exception-catch method on {0}:\n".format(
-                    self.script_path
-                )
-            )
-            errors["try-catch"] = "{0}\n".format(traceback.format_exc())
+        if self.static:
+            # Build the parser from the AST without running anything
+            try:
+                parsers.append(source_parser.build_argparse_parser(self.script_source))
+            except Exception:
+                errors["static"] = "{0}\n".format(traceback.format_exc())
 
-        argparse.ArgumentParser.parse_args = parse_args_unmonkey
+        if not parsers:
+            # Try exception-catching next; this should always work
+            try:
+                with intercepted_parse_args():
+                    exec(
+                        self.script_source,
+                        {
+                            "argparse": argparse,
+                            "__name__": "__main__",
+                            "__file__": self.script_path,
+                        },
+                    )
+            except ClintoArgumentParserException as e:
+                # Catch the generated exception, passing the ArgumentParser object
+                parsers.append(e.parser)
+            except ParserExceptions:
+                sys.stderr.write(
+                    "Error while trying exception-catch method on {0}:\n".format(
+                        self.script_path
+                    )
+                )
+                errors["try-catch"] = "{0}\n".format(traceback.format_exc())
 
         if not parsers:
             try:
@@ -307,14 +382,17 @@ class ArgParseParser(BaseParser):
                 ]
         if not parsers:
             try:
-                with tempfile.NamedTemporaryFile(delete=False, mode="wb") as f:
-                    ast_source = source_parser.parse_source_file(
-                        self.script_path, ignore_bad_imports=self.ignore_bad_imports
-                    )
-                    python_code = source_parser.convert_to_python(list(ast_source))
-                    f.write("\n".join(python_code).encode())
-                module = load_module_from_path("__main__", f.name)
-                os.remove(f.name)
+                ast_source = source_parser.parse_source_file(
+                    self.script_path,
+                    ignore_bad_imports=self.ignore_bad_imports,
+                    source=self.script_source,
+                )
+                code = source_parser.compile_ast_source(
+                    list(ast_source), self.script_path
+                )
+                module = types.ModuleType("__main__")
+                module.__file__ = self.script_path
+                exec(code, module.__dict__)
             except Exception:
                 sys.stderr.write(
                     "Error while converting {0} to ast:\n".format(self.script_path)
@@ -398,7 +476,7 @@ class ArgParseParser(BaseParser):
 
             self.parsers[parser_name] = {"nodes": nodes, "containers": containers}
 
-    def get_script_description(self):
+    def build_script_description(self):
         input_dict = OrderedDict()
         parser_schema = {
             "name": self.class_name,
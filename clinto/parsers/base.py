@@ -1,12 +1,21 @@
 from __future__ import absolute_import
+import argparse
+import contextvars
 import copy
 import importlib.machinery
 import importlib.util
 import json
 import os
 import sys
+import threading
+import types
+import zipfile
+import zipimport
 from contextlib import contextmanager
 
+from ..utils import SpecJSONEncoder, context_sys_path, dump_json
+from .stubs import stubbed_imports
+
 
 def update_dict_copy(a, b):
     temp = copy.deepcopy(a)
@@ -14,12 +23,12 @@ def update_dict_copy(a, b):
     return temp
 
 
-@contextmanager
 def inserted_sys_path(path):
-    if path:
-        sys.path.insert(0, path)
-        yield
-        sys.path.pop(0)
+    """
+    Makes modules in path importable while extracting. This only applies to the current
+    thread, so parsers may be extracted concurrently.
+    """
+    return context_sys_path(path)
 
 
 class ClintoArgumentParserException(Exception):
@@ -31,7 +40,70 @@ def parse_args_monkeypatch(self, *args, **kwargs):
     raise ClintoArgumentParserException(self)
 
 
+_intercept_parse_args = contextvars.ContextVar(
+    "clinto_intercept_parse_args", default=False
+)
+_original_parse_args = argparse.ArgumentParser.parse_args
+_install_lock = threading.Lock()
+_load_module_lock = threading.RLock()
+
+
+def parse_args_interceptor(self, *args, **kwargs):
+    if _intercept_parse_args.get():
+        return parse_args_monkeypatch(self, *args, **kwargs)
+    return _original_parse_args(self, *args, **kwargs)
+
+
+@contextmanager
+def intercepted_parse_args():
+    """
+    Within the context, ArgumentParser.parse_args raises ClintoArgumentParserException
+    with the parser instead of parsing. Rather than swapping the method for the whole
+    process, an interceptor is installed once and only acts in contexts (threads or
+    asyncio tasks) that asked for it; everywhere else parse_args behaves as normal.
+    """
+    with _install_lock:
+        if argparse.ArgumentParser.parse_args is not parse_args_interceptor:
+            argparse.ArgumentParser.parse_args = parse_args_interceptor
+    token = _intercept_parse_args.set(True)
+    try:
+        yield
+    finally:
+        _intercept_parse_args.reset(token)
+
+
+def split_zip_path(path):
+    """
+    Splits a path inside of a zip archive, e.g. app.zip/pkg/module.py, into the archive
+    and the member. Returns (None, None) for paths that are not inside an archive.
+    """
+    archive, member = path, ""
+    while archive and not os.path.exists(archive):
+        archive, tail = os.path.split(archive)
+        if not tail:
+            break
+        member = "/".join(i for i in (tail, member) if i)
+    if member and os.path.isfile(archive) and zipfile.is_zipfile(archive):
+        return archive, member
+    return None, None
+
+
+def load_module_from_zip(module_name, path):
+    archive, member = split_zip_path(path)
+    package_path, file_name = os.path.split(member)
+    importer = zipimport.zipimporter(os.path.join(archive, package_path))
+    code = importer.get_code(os.path.splitext(file_name)[0])
+    module = types.ModuleType(module_name)
+    module.__file__ = path
+    module.__loader__ = importer
+    exec(code, module.__dict__)
+    return module
+
+
 def load_module_from_path(module_name, path):
+    if not os.path.exists(path) and split_zip_path(path)[0] is not None:
+        return load_module_from_zip(module_name, path)
+
     spec = importlib.util.spec_from_file_location(module_name, path)
     if spec is None or spec.loader is None:
         loader = importlib.machinery.SourceFileLoader(module_name, path)
@@ -43,44 +115,59 @@ def load_module_from_path(module_name, path):
         )
 
     module = importlib.util.module_from_spec(spec)
-    previous_module = sys.modules.get(module_name)
-    sys.modules[module_name] = module
+    # The module is registered while it runs, which is process wide, so concurrent
+    # loads under the same name are serialized
+    with _load_module_lock:
+        previous_module = sys.modules.get(module_name)
+        sys.modules[module_name] = module
+
+        try:
+            spec.loader.exec_module(module)
+        finally:
+            if previous_module is None:
+                sys.modules.pop(module_name, None)
+            else:
+                sys.modules[module_name] = previous_module
 
-    try:
-        spec.loader.exec_module(module)
-    except Exception:
-        if previous_module is None:
-            sys.modules.pop(module_name, None)
-        else:
-            sys.modules[module_name] = previous_module
-        raise
+    return module
 
-    if previous_module is None:
-        sys.modules.pop(module_name, None)
-    else:
-        sys.modules[module_name] = previous_module
 
-    return module
+def get_script_ext(script_path):
+    if not script_path:
+        return ""
+    return os.path.splitext(os.path.basename(script_path))[1]
 
 
 class BaseParser(object):
-    def __init__(self, script_path=None, script_source=None, ignore_bad_imports=False):
+    def __init__(
+        self,
+        script_path=None,
+        script_source=None,
+        ignore_bad_imports=False,
+        static=False,
+        stub_imports=None,
+    ):
         self.is_valid = False
         self.error = ""
         self.parser = None
         self.ignore_bad_imports = ignore_bad_imports
+        self.static = static
+        self.stub_imports = stub_imports
 
         self.script_path = script_path
         # We need this for heuristic, may as well happen once
-        if self.script_path:
-            self.script_ext = os.path.splitext(os.path.basename(self.script_path))[1]
+        self.script_ext = get_script_ext(self.script_path)
 
         self.script_source = script_source
 
         self._heuristic_score = None
+        # The description and its JSON, built once on first use
+        self._description = None
+        self._json = None
 
-        with inserted_sys_path(
-            os.path.dirname(self.script_path) if self.script_path else None
+        script_dir = os.path.dirname(self.script_path) if self.script_path else None
+        with inserted_sys_path(script_dir), stubbed_imports(
+            self.stub_imports, local_path=script_dir
         ):
             self.extract_parser()
 
@@ -102,19 +189,63 @@ class BaseParser(object):
         :return: float
         """
         if self._heuristic_score is None:
-            matches = self.heuristic()
-            self._heuristic_score = float(sum(matches)) / float(len(matches))
+            self._heuristic_score = self.calculate_score(
+                script_path=self.script_path, script_source=self.script_source
+            )
         return self._heuristic_score
 
+    @classmethod
+    def calculate_score(cls, script_path=None, script_source=None):
+        """
+        Calculate the heuristic score from the script path and source alone, without
+        instantiating (and therefore executing anything through) the parser.
+
+        :return: float
+        """
+        matches = cls.heuristic(get_script_ext(script_path), script_source or "")
+        return float(sum(matches)) / float(len(matches))
+
+    @classmethod
+    def heuristic(cls, script_ext, script_source):
+        return [False]
+
+    @classmethod
+    def token_heuristic(cls, signals):
+        """
+        Like heuristic, but from the signals found in the tokens of the script (see
+        clinto.triage.scan_tokens), so names in comments and strings do not count.
+        """
+        return [False]
+
     def extract_parser(self):
         pass
 
     def process_parser(self):
         pass
 
-    def get_script_description(self):
+    def build_script_description(self):
         return {}
 
+    def get_script_description(self):
+        """
+        Returns the description of the script. It is built once and shared between
+        callers, so copy it before modifying it.
+        """
+        if self._description is None:
+            self._description = self.build_script_description()
+        return self._description
+
     @property
     def json(self):
-        return json.dumps(self.get_script_description())
+        if self._json is None:
+            self._json = json.dumps(self.get_script_description(), cls=SpecJSONEncoder)
+        return self._json
+
+    def dump_json(self, fp):
+        """
+        Writes the description as JSON to the file-like object fp.
+        """
+        if self._json is not None:
+            fp.write(self._json)
+        else:
+            dump_json(self.get_script_description(), fp)
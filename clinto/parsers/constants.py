@@ -1,3 +1,10 @@
 # This indicates a parameter key should be specified for every argument. e.g. --foo 1 --foo 2 instead
 # of --foo 1 2
 SPECIFY_EVERY_PARAM = "specify_every_param"
+
+# Bounds on how much of a script's values is copied into its description. choices and
+# container defaults with more items are truncated, and the node gains
+# <attr>_truncated, <attr>_count and, for a range, <attr>_range entries. These are read
+# whenever a node is built, so they may be changed at run time. None disables a limit.
+MAX_CHOICES = 1000
+MAX_DEFAULT_ITEMS = 1000
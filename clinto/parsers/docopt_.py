@@ -1,11 +1,12 @@
 from __future__ import absolute_import
 
-import sys
-import os
+import ast
+import hashlib
 import json
-import inspect
+import os
+import re
+import threading
 import traceback
-import types
 from collections import OrderedDict
 from .base import (
     BaseParser,
@@ -68,19 +69,27 @@ class DocOptNode(object):
     This class takes an argument parser entry and assigns it to a Build spec
     """
 
-    def __init__(self, name, option=None):
-        field_type = TYPE_FIELDS.get(option.type)
+    __slots__ = ("node_attrs",)
+
+    def __init__(self, name, option=None, option_type=None):
+        """
+        :param option_type: The type of the option's value, in place of option.type, so
+          shared options need not be modified.
+        """
+        if option_type is None:
+            option_type = getattr(option, "type", None)
+        field_type = TYPE_FIELDS.get(option_type)
         if field_type is None:
             field_types = [
                 i
                 for i in TYPE_FIELDS.keys()
-                if i is not None and issubclass(type(option.type), i)
+                if i is not None and issubclass(type(option_type), i)
             ]
             if len(field_types) > 1:
                 field_types = [
                     i
                     for i in TYPE_FIELDS.keys()
-                    if i is not None and isinstance(option.type, i)
+                    if i is not None and isinstance(option_type, i)
                 ]
             if len(field_types) == 1:
                 field_type = TYPE_FIELDS[field_types[0]]
@@ -96,12 +105,148 @@ class DocOptNode(object):
         return json.dumps(self.node_attrs)
 
 
+class DocOptLeafNode(object):
+    """
+    Describes a positional argument (e.g. <name>) or a command of the usage patterns
+    """
+
+    __slots__ = ("node_attrs",)
+
+    def __init__(self, leaf):
+        if isinstance(leaf, docopt.Command):
+            self.node_attrs = {
+                "model": "BooleanField",
+                "type": "checkbox",
+                "name": leaf.name,
+                "param": leaf.name,
+            }
+            return
+        self.node_attrs = {
+            "model": "CharField",
+            "type": "text",
+            "name": leaf.name.strip("<>"),
+            "param": "",
+        }
+        # A repeated argument, e.g. <name>...
+        if isinstance(leaf.value, list):
+            self.node_attrs["choice_limit"] = ">=1"
+
+    @property
+    def name(self):
+        return self.node_attrs.get("name")
+
+    def __str__(self):
+        return json.dumps(self.node_attrs)
+
+
+def get_module_docstring(source):
+    """
+    Returns the docstring of the module in source, or a string literal assigned to
+    __doc__, without running it.
+    """
+    module = ast.parse(source)
+    doc = ast.get_docstring(module, clean=False)
+    if doc is not None:
+        return doc
+    for node in module.body:
+        if (
+            isinstance(node, ast.Assign)
+            and any(isinstance(i, ast.Name) and i.id == "__doc__" for i in node.targets)
+            and isinstance(node.value, ast.Constant)
+            and isinstance(node.value.value, str)
+        ):
+            doc = node.value.value
+    return doc
+
+
+def uses_docopt(source):
+    """
+    Whether the module in source imports docopt or calls a docopt function, so that its
+    docstring is meant to be read as usage patterns.
+    """
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            if any(i.name.partition(".")[0] == "docopt" for i in node.names):
+                return True
+        elif isinstance(node, ast.ImportFrom):
+            if (node.module or "").partition(".")[0] == "docopt":
+                return True
+        elif isinstance(node, ast.Call):
+            func = node.func
+            if (isinstance(func, ast.Name) and func.id == "docopt") or (
+                isinstance(func, ast.Attribute) and func.attr == "docopt"
+            ):
+                return True
+    return False
+
+
+# A line starting a new section of the docstring, e.g. "Options:"
+SECTION_HEADER = re.compile(r"^\S.*:\s*$")
+
+
+def get_usage(doc):
+    """
+    Returns the usage section of doc. docopt reads it up to the first blank line, so a
+    section directly following it (e.g. "Options:") would be read as usage patterns.
+    This stops at the next section header instead.
+    """
+    lines = docopt.printable_usage(doc).splitlines()
+    usage = lines[:1]
+    for line in lines[1:]:
+        if SECTION_HEADER.match(line):
+            break
+        usage.append(line)
+    return "\n".join(usage)
+
+
+# Parsed docstrings by their hash, most recently used last. Many scripts share their
+# usage blocks, and parsing one is far slower than hashing it.
+DOCOPT_CACHE_SIZE = 256
+_docopt_cache = OrderedDict()
+_docopt_cache_lock = threading.Lock()
+
+
+def parse_docopt(doc):
+    """
+    Returns the options and the usage pattern of a docopt docstring, built as
+    docopt.docopt builds them. Results are shared between callers and must not be
+    modified.
+    """
+    key = hashlib.sha256(doc.encode("utf-8", "surrogatepass")).digest()
+    with _docopt_cache_lock:
+        cached = _docopt_cache.get(key)
+        if cached is not None:
+            _docopt_cache.move_to_end(key)
+            return cached
+
+    options = docopt.parse_defaults(doc)
+    # This adds any options only found in the usage patterns to options
+    pattern = docopt.parse_pattern(docopt.formal_usage(get_usage(doc)), options)
+    parsed = (tuple(options), pattern.fix())
+
+    with _docopt_cache_lock:
+        _docopt_cache[key] = parsed
+        while len(_docopt_cache) > DOCOPT_CACHE_SIZE:
+            _docopt_cache.popitem(last=False)
+    return parsed
+
+
 class DocOptParser(BaseParser):
-    def heuristic(self):
+    @classmethod
+    def heuristic(cls, script_ext, script_source):
+        return [
+            script_ext in [".py", ".py3", ".py2"],
+            "docopt" in script_source,
+            "__doc__" in script_source,
+        ]
+
+    @classmethod
+    def token_heuristic(cls, signals):
         return [
-            self.script_ext in [".py", ".py3", ".py2"],
-            "docopt" in self.script_source,
-            "__doc__" in self.script_source,
+            "import:docopt" in signals,
+            "call:docopt" in signals,
+            "usage" in signals,
+            "main_guard" in signals,
         ]
 
     def extract_parser(self):
@@ -109,22 +254,22 @@ class DocOptParser(BaseParser):
             return False
 
         try:
-            module = types.ModuleType("__name__")
-            exec(self.script_source, module.__dict__)
-
-        except Exception:
-            sys.stderr.write("Error while loading {0}:\n".format(self.script_path))
+            doc = get_module_docstring(self.script_source)
+            # Any script may have a usage section in its docstring, e.g. an argparse
+            # script using it as its description
+            docopt_script = uses_docopt(self.script_source)
+        except SyntaxError:
             self.error = "{0}\n".format(traceback.format_exc())
-            sys.stderr.write(self.error)
             return
 
-        try:
-            doc = module.__doc__
-
-        except AttributeError:
+        if not docopt_script:
+            self.error = "{0} does not use docopt\n".format(self.script_path)
             return
 
         if doc is None:
+            self.error = "Unable to find a module docstring in {0}\n".format(
+                self.script_path
+            )
             return
 
         # We have the documentation string in 'doc'
@@ -133,18 +278,17 @@ class DocOptParser(BaseParser):
 
     def process_parser(self):
         """
-        We can't use the exception catch trick for docopt because the module prevents access to
-        it's innards __all__ = ['docopt']. Instead call with --help enforced, catch sys.exit and
-        work up to the calling docopt function to pull out the elements. This is horrible.
+        Parses the usage patterns and options of the docstring with docopt's own parser,
+        as docopt.docopt would, without executing the script.
 
         :return:
         """
-
         try:
-            # Parse with --help to enforce exit
-            usage_sections = docopt.docopt(self.parser, ["--help"])
-        except SystemExit as e:
-            parser = inspect.trace()[-2][0].f_locals
+            options, pattern = parse_docopt(self.parser)
+        except docopt.DocoptLanguageError:
+            self.error = "{0}\n".format(traceback.format_exc())
+            self.is_valid = False
+            return
 
         """
         docopt represents all values as strings and doesn't automatically cast, we probably want to do
@@ -152,6 +296,9 @@ class DocOptParser(BaseParser):
         """
 
         def guess_type(s):
+            if s is None:
+                # An option taking a value, without a default
+                return None
             try:
                 v = float(s)
                 v = int(s)
@@ -161,29 +308,44 @@ class DocOptParser(BaseParser):
 
             return type(v)
 
-        self.script_groups = ["Arguments"]
         self.nodes = OrderedDict()
         self.containers = OrderedDict()
         self.containers["default"] = []
 
-        for option in parser["options"]:
+        for option in options:
             if option.long in ["--help", "--version"]:
                 continue
 
-            option.type = guess_type(option.value)
-            option_name = option.long.strip("-")
-            node = DocOptNode(option_name, option=option)
+            option_name = (option.long or option.short).strip("-")
+            node = DocOptNode(
+                option_name, option=option, option_type=guess_type(option.value)
+            )
 
             self.nodes[option_name] = node
             self.containers["default"].append(option_name)
 
+        for container_name, leaf_type in (
+            ("arguments", docopt.Argument),
+            ("commands", docopt.Command),
+        ):
+            # The same argument or command may appear in several usage patterns
+            leaves = OrderedDict()
+            for leaf in pattern.flat(leaf_type):
+                leaves.setdefault(leaf.name, leaf)
+            for leaf in leaves.values():
+                node = DocOptLeafNode(leaf)
+                if node.name in self.nodes:
+                    continue
+                self.nodes[node.name] = node
+                self.containers.setdefault(container_name, []).append(node.name)
+
         self.class_name = os.path.splitext(os.path.basename(self.script_path))[0]
         self.script_path = self.script_path
         self.script_description = self.parser
         # TODO: Make AST compatible parser for docopt to extract the version provided to docopt function
         # self.script_version = parser.get('version')
 
-    def get_script_description(self):
+    def build_script_description(self):
         # There are no real subparsers in docopt that we can access via introspection so we use the default
         # subparser of '' (no subparser/main parser)
         parser_name = ""
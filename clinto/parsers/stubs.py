@@ -0,0 +1,219 @@
+"""
+An import hook that serves cheap stand-in modules for heavyweight dependencies while a
+script's parser is being extracted. A script doing ``import numpy as np`` at module
+level then costs nothing, and ``np.float64`` or ``np.load`` still evaluate (to stubs)
+when they are used to build the parser.
+"""
+
+import contextvars
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import os
+import sys
+from contextlib import contextmanager
+
+from ..utils import install_meta_path_finder
+
+# Modules that must never be stubbed, as extraction depends on them
+NEVER_STUB = {"argparse", "clinto", "docopt"}
+
+
+def is_stdlib_module(name):
+    if name in sys.builtin_module_names:
+        return True
+    stdlib_names = getattr(sys, "stdlib_module_names", None)
+    if stdlib_names is not None:
+        return name in stdlib_names
+    # Python < 3.10, fall back to checking where the module lives
+    spec = importlib.machinery.PathFinder.find_spec(name)
+    if spec is None or not spec.origin:
+        return False
+    import sysconfig
+
+    return spec.origin.startswith(sysconfig.get_paths()["stdlib"]) and (
+        "site-packages" not in spec.origin
+    )
+
+
+class StubObject(object):
+    """
+    Stands in for any attribute of a stubbed module. Attribute access, calls, indexing
+    and arithmetic all return further stubs.
+    """
+
+    def __init__(self, name):
+        self._stub_name = name
+
+    def __getattr__(self, name):
+        if name == "_stub_name" or (name.startswith("__") and name.endswith("__")):
+            raise AttributeError(name)
+        return StubObject("{0}.{1}".format(self._stub_name, name))
+
+    def __call__(self, *args, **kwargs):
+        return StubObject("{0}()".format(self._stub_name))
+
+    def __getitem__(self, key):
+        return StubObject("{0}[]".format(self._stub_name))
+
+    def __iter__(self):
+        return iter(())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def __mro_entries__(self, bases):
+        # Allows subclassing a stub, e.g. class Model(torch.nn.Module)
+        return (object,)
+
+    def __repr__(self):
+        return "<stub {0}>".format(self._stub_name)
+
+    def _stub_operator(self, *args):
+        return self
+
+    __add__ = __radd__ = __sub__ = __rsub__ = __mul__ = __rmul__ = _stub_operator
+    __truediv__ = __rtruediv__ = __floordiv__ = __rfloordiv__ = _stub_operator
+    __mod__ = __rmod__ = __pow__ = __rpow__ = __neg__ = __pos__ = _stub_operator
+    __and__ = __rand__ = __or__ = __ror__ = __xor__ = __rxor__ = _stub_operator
+
+
+class StubModule(StubObject, type(sys)):
+    def __init__(self, name):
+        type(sys).__init__(self, name)
+        StubObject.__init__(self, name)
+        # Mark it as a package so submodule imports also reach the stub finder
+        self.__path__ = []
+
+
+class StubLoader(importlib.abc.Loader):
+    def create_module(self, spec):
+        return StubModule(spec.name)
+
+    def exec_module(self, module):
+        pass
+
+
+class StubFinder(importlib.abc.MetaPathFinder):
+    """
+    Serves stub modules for the top level packages in modules. If modules is True,
+    every package outside of the standard library is stubbed, except those found in
+    local_path (the directory of the script, whose own modules should run).
+    """
+
+    def __init__(self, modules=True, local_path=None):
+        self.modules = modules if modules is True else set(modules)
+        self.local_path = local_path
+        self.loader = StubLoader()
+        # Every module looked up while this finder was active, stubbed or not
+        self.imported = set()
+
+    def should_stub(self, fullname):
+        top_level = fullname.partition(".")[0]
+        if top_level in NEVER_STUB:
+            return False
+        if self.modules is not True:
+            return top_level in self.modules or fullname in self.modules
+        if is_stdlib_module(top_level):
+            return False
+        if self.local_path and importlib.machinery.PathFinder.find_spec(
+            top_level, [self.local_path]
+        ):
+            return False
+        return True
+
+    def find_spec(self, fullname, path=None, target=None):
+        if not self.should_stub(fullname):
+            return None
+        return importlib.util.spec_from_loader(fullname, self.loader, is_package=True)
+
+
+_active_stub_finder = contextvars.ContextVar("clinto_stub_finder", default=None)
+
+
+class ContextStubFinder(importlib.abc.MetaPathFinder):
+    """
+    Installed once at the front of sys.meta_path, this defers to the StubFinder of the
+    current thread (or asyncio task), if stubbing is active there.
+    """
+
+    # Stubbing only applies while extracting, so lookups through it must not be memoized
+    transient = True
+
+    def find_spec(self, fullname, path=None, target=None):
+        finder = _active_stub_finder.get()
+        if finder is None:
+            return None
+        finder.imported.add(fullname)
+        return finder.find_spec(fullname, path=path, target=target)
+
+
+_context_stub_finder = ContextStubFinder()
+
+
+def is_local_module(module, local_path):
+    module_file = getattr(module, "__file__", None)
+    return bool(
+        local_path
+        and module_file
+        and os.path.abspath(module_file).startswith(
+            os.path.join(os.path.abspath(local_path), "")
+        )
+    )
+
+
+def find_stubbed_modules(names, local_path=None):
+    """
+    Returns those of the modules names that are stubs, hold a stub (or a module being
+    removed) or were loaded from local_path. Standard library modules never are.
+    """
+    modules = dict((i, sys.modules[i]) for i in names if i in sys.modules)
+    stubbed = set(i for i, module in modules.items() if isinstance(module, StubModule))
+    stubbed_objects = set(id(modules[i]) for i in stubbed)
+    changed = True
+    while changed:
+        changed = False
+        for name, module in modules.items():
+            if name in stubbed or is_stdlib_module(name.partition(".")[0]):
+                continue
+            if is_local_module(module, local_path) or any(
+                isinstance(i, StubObject) or id(i) in stubbed_objects
+                for i in list(vars(module).values())
+            ):
+                stubbed.add(name)
+                stubbed_objects.add(id(module))
+                changed = True
+    return stubbed
+
+
+@contextmanager
+def stubbed_imports(modules=None, local_path=None):
+    """
+    Serves stub modules for the duration of the context. With modules as None this
+    does nothing. Afterwards the stubs are removed from sys.modules, so later, real
+    imports of the same packages are unaffected, along with the modules imported in
+    the context that hold on to them or were loaded from local_path.
+
+    Which imports are stubbed is local to the current thread, but sys.modules is not:
+    while a stub is registered there, other threads importing the same module get it.
+    """
+    if not modules:
+        yield
+        return
+
+    install_meta_path_finder(_context_stub_finder, before=None)
+    modules_snapshot = set(sys.modules)
+    finder = StubFinder(modules=modules, local_path=local_path)
+    token = _active_stub_finder.set(finder)
+    try:
+        yield
+    finally:
+        _active_stub_finder.reset(token)
+        # Only modules this context imported, leaving those of other threads alone
+        for name in find_stubbed_modules(
+            finder.imported - modules_snapshot, local_path=local_path
+        ):
+            sys.modules.pop(name, None)
@@ -0,0 +1,180 @@
+"""
+Keep the descriptions of a tree of scripts up to date, re-parsing only the scripts that
+changed since the last scan.
+"""
+
+import os
+import pickle
+import tempfile
+import time
+from collections import namedtuple
+
+from .batch import parse_scripts
+from .cli import find_scripts
+from .fingerprint import find_script_files, fingerprint_script
+from .version import __version__
+
+# files maps each file the script is made of (see find_script_files) to its
+# (mtime_ns, size) when the script was fingerprinted
+ManifestEntry = namedtuple(
+    "ManifestEntry", ["path", "files", "fingerprint", "description", "error"]
+)
+
+
+class ScanResult(
+    namedtuple("ScanResult", ["added", "modified", "removed", "unchanged"])
+):
+    """
+    The paths of scripts found by a scan, by what happened to them since the last one.
+    """
+
+    __slots__ = ()
+
+    @property
+    def changed(self):
+        return bool(self.added or self.modified or self.removed)
+
+
+def stat_files(paths):
+    """
+    Returns {path: (mtime_ns, size)} for paths, or None if any of them is missing.
+    """
+    stats = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stats[path] = (stat.st_mtime_ns, stat.st_size)
+    return stats
+
+
+class Scanner(object):
+    """
+    Scans files, directories and glob patterns of scripts (see clinto.cli.find_scripts),
+    storing the description of each in a manifest at manifest_path between scans.
+
+    A script is unchanged while the modification times and sizes of it and the local
+    modules it imports are. Otherwise it is fingerprinted, and only parsed again if its
+    fingerprint differs.
+
+    :param retry_failed: Parse scripts that failed last time again on every scan, even
+      if unchanged, as the failure may have been a timeout or a dependency installed
+      since. They are reported as modified once they parse. Modules that are not
+      CLIs fail too, so this is off by default.
+    :param parser_kwargs: Passed to parse_scripts, e.g. workers or timeout.
+    """
+
+    def __init__(self, manifest_path, paths, retry_failed=False, **parser_kwargs):
+        self.manifest_path = manifest_path
+        self.paths = paths
+        self.retry_failed = retry_failed
+        self.parser_kwargs = parser_kwargs
+        self.entries = self.load()
+
+    def load(self):
+        try:
+            with open(self.manifest_path, "rb") as f:
+                manifest = pickle.load(f)
+        except Exception:
+            # A missing or unreadable manifest only costs a full scan
+            return {}
+        if manifest.get("version") != __version__:
+            return {}
+        return manifest["entries"]
+
+    def save(self):
+        manifest_dir = os.path.dirname(os.path.abspath(self.manifest_path))
+        fd, temp_path = tempfile.mkstemp(dir=manifest_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(
+                    {"version": __version__, "entries": self.entries},
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(temp_path, self.manifest_path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def get_description(self, script_path):
+        entry = self.entries.get(os.path.abspath(script_path))
+        return entry.description if entry is not None else None
+
+    def scan(self):
+        """
+        Re-parses new and changed scripts, forgets removed ones and saves the manifest.
+        Returns a ScanResult.
+        """
+        added, modified, unchanged = [], [], []
+        to_parse = {}
+        retried = set()
+        found = set()
+        for script_path in find_scripts(self.paths):
+            script_path = os.path.abspath(script_path)
+            found.add(script_path)
+            entry = self.entries.get(script_path)
+            retry = (
+                self.retry_failed and entry is not None and entry.description is None
+            )
+            if (
+                entry is not None
+                and not retry
+                and stat_files(entry.files) == entry.files
+            ):
+                unchanged.append(script_path)
+                continue
+
+            try:
+                files = stat_files(find_script_files(script_path))
+                fingerprint = fingerprint_script(script_path)
+            except OSError:
+                # Removed while scanning
+                found.discard(script_path)
+                continue
+            if files is None:
+                found.discard(script_path)
+                continue
+            if entry is not None and entry.fingerprint == fingerprint:
+                if retry:
+                    retried.add(script_path)
+                    to_parse[script_path] = (files, fingerprint)
+                    continue
+                # Touched, but not changed
+                self.entries[script_path] = entry._replace(files=files)
+                unchanged.append(script_path)
+                continue
+            (modified if entry is not None else added).append(script_path)
+            to_parse[script_path] = (files, fingerprint)
+
+        for result in parse_scripts(list(to_parse), **self.parser_kwargs):
+            files, fingerprint = to_parse[result.path]
+            self.entries[result.path] = ManifestEntry(
+                result.path, files, fingerprint, result.description, result.error
+            )
+            if result.path in retried:
+                # Still failing scripts are not reported as changed on every scan
+                if result.description is None:
+                    unchanged.append(result.path)
+                else:
+                    modified.append(result.path)
+
+        removed = [i for i in self.entries if i not in found]
+        for script_path in removed:
+            del self.entries[script_path]
+
+        self.save()
+        return ScanResult(added, modified, removed, unchanged)
+
+    def watch(self, interval=2.0):
+        """
+        Scans every interval seconds, yielding the ScanResult of each scan that found
+        changes, starting with the first scan if anything was new. This runs until
+        the caller stops iterating.
+        """
+        while True:
+            result = self.scan()
+            if result.changed:
+                yield result
+            time.sleep(interval)
@@ -0,0 +1,188 @@
+"""
+A long running extraction daemon listening on a Unix socket.
+
+The server imports clinto, and any configured modules the scripts commonly share, once.
+Each request is then handled in a forked, copy-on-write child, so extraction is
+isolated per script without paying for interpreter start up and imports every time.
+
+Start it with ``python -m clinto.server --socket /run/clinto.sock --preload numpy`` and
+query it with request_description.
+
+Requests and responses are pickled, so the socket is only accessible to its owner and
+should never be exposed to untrusted clients.
+"""
+
+import argparse
+import errno
+import gc
+import importlib
+import os
+import pickle
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import traceback
+
+from .batch import ParseResult, parse_script
+
+DEFAULT_PRELOAD = ["argparse", "astor", "clinto.parser", "docopt"]
+
+# Messages are a 4 byte, big-endian length followed by a pickle
+HEADER = struct.Struct(">I")
+
+
+def send_message(fp, obj):
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    fp.write(HEADER.pack(len(data)))
+    fp.write(data)
+    fp.flush()
+
+
+def recv_message(fp):
+    header = fp.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise EOFError("Connection closed")
+    (length,) = HEADER.unpack(header)
+    data = fp.read(length)
+    if len(data) < length:
+        raise EOFError("Connection closed")
+    return pickle.loads(data)
+
+
+class ExtractionHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = recv_message(self.rfile)
+        except EOFError:
+            return
+        script_path = request.get("script_path")
+        try:
+            # The description is plain data, so it unpickles without the script
+            result = parse_script(script_path, **request.get("parser_kwargs", {}))
+            send_message(self.wfile, result)
+        except Exception:
+            send_message(
+                self.wfile, ParseResult(script_path, None, traceback.format_exc())
+            )
+
+
+def remove_stale_socket(socket_path):
+    """
+    Removes the socket at socket_path if the server that created it is gone. Anything
+    else there, a file or the socket of a running server, raises OSError instead.
+    """
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(errno.EEXIST, "Not a socket", socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except ConnectionRefusedError:
+            os.remove(socket_path)
+            return
+        # Ends the connection for the server's handler too, even if a forked copy of
+        # this socket is still open
+        sock.shutdown(socket.SHUT_RDWR)
+    raise OSError(errno.EADDRINUSE, "A server is already listening", socket_path)
+
+
+class ExtractionServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves extraction requests on socket_path, forking a child for each one.
+
+    :param preload: Modules to import before serving, in addition to DEFAULT_PRELOAD.
+    :param max_children: The most requests handled at once.
+    """
+
+    def __init__(self, socket_path, preload=(), max_children=40):
+        self.socket_path = socket_path
+        self.max_children = max_children
+        self.preload(list(DEFAULT_PRELOAD) + list(preload))
+        remove_stale_socket(socket_path)
+        socketserver.UnixStreamServer.__init__(self, socket_path, ExtractionHandler)
+
+    def server_bind(self):
+        # Create the socket accessible to its owner only, rather than changing its mode
+        # after it is already reachable
+        umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.server_bind(self)
+        finally:
+            os.umask(umask)
+
+    @staticmethod
+    def preload(modules):
+        for module in modules:
+            try:
+                importlib.import_module(module)
+            except Exception:
+                sys.stderr.write("Unable to preload {0}:\n".format(module))
+                sys.stderr.write(traceback.format_exc())
+        # Keep the preloaded objects out of the garbage collector's reach so children
+        # do not touch (and copy) their pages
+        if hasattr(gc, "freeze"):
+            gc.collect()
+            gc.freeze()
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def request_description(socket_path, script_path, socket_timeout=None, **parser_kwargs):
+    """
+    Asks the server at socket_path to parse script_path, returning a ParseResult.
+    Keyword arguments, such as timeout, are passed to the Parser in the server.
+
+    :param socket_timeout: Seconds to wait on the socket before raising socket.timeout.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(socket_timeout)
+        sock.connect(socket_path)
+        with sock.makefile("rwb") as fp:
+            send_message(
+                fp,
+                {
+                    "script_path": os.path.abspath(script_path),
+                    "parser_kwargs": parser_kwargs,
+                },
+            )
+            return recv_message(fp)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a clinto extraction server.")
+    parser.add_argument("--socket", required=True, help="The Unix socket to listen on")
+    parser.add_argument(
+        "--preload",
+        nargs="*",
+        default=[],
+        help="Modules to import once, before serving, e.g. numpy pandas",
+    )
+    parser.add_argument(
+        "--max-children",
+        type=int,
+        default=40,
+        help="The most requests handled at once",
+    )
+    args = parser.parse_args(argv)
+
+    server = ExtractionServer(
+        args.socket, preload=args.preload, max_children=args.max_children
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
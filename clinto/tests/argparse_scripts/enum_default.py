@@ -0,0 +1,16 @@
+import argparse
+import enum
+
+
+class Color(enum.Enum):
+    RED = "red"
+    GREEN = "green"
+
+
+parser = argparse.ArgumentParser(description="Pick a color")
+parser.add_argument(
+    "--color", type=Color, choices=list(Color), default=Color.RED, help="The color"
+)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
@@ -0,0 +1,19 @@
+import argparse
+
+
+def add_common(parser):
+    parser.add_argument("--verbose", action="store_true")
+
+
+parser = argparse.ArgumentParser(description="Arguments added outside of add_argument")
+parser.add_argument("--a")
+for name in ["--b", "--c"]:
+    parser.add_argument(name)
+add_common(parser)
+try:
+    parser.add_argument("--d")
+except argparse.ArgumentError:
+    pass
+
+if __name__ == "__main__":
+    args = parser.parse_args()
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from clinto.asyncio_ import parse_script_async, parse_scripts_async
+from clinto.isolation import ISOLATED_TECHNIQUE
+from clinto.parser import Parser
+
+
+class TestAsyncio(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = os.path.split(__file__)[0]
+        self.script_dir = os.path.join(self.base_dir, "argparse_scripts")
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def write_script(self, source):
+        script_path = os.path.join(self.temp_dir, "script.py")
+        with open(script_path, "w") as f:
+            f.write(source)
+        return script_path
+
+    def test_parse_script_async(self):
+        script_path = os.path.join(self.script_dir, "choices.py")
+        result = asyncio.run(parse_script_async(script_path))
+        self.assertEqual(result.error, "")
+        self.assertEqual(
+            result.description,
+            Parser(script_path=script_path).get_script_description(),
+        )
+
+    def test_script_defined_default(self):
+        script_path = os.path.join(self.script_dir, "enum_default.py")
+        result = asyncio.run(parse_script_async(script_path))
+        self.assertEqual(result.error, "")
+        node = result.description["inputs"][""][0]["nodes"][0]
+        self.assertEqual(node["value"], "Color.RED")
+
+    def test_worker_sys_path(self):
+        script_path = self.write_script(
+            "import argparse\n"
+            "import sys\n"
+            "parser = argparse.ArgumentParser(description=repr(sys.path))\n"
+        )
+        result = asyncio.run(parse_script_async(script_path))
+        self.assertEqual(result.description["description"], repr(sys.path))
+
+    def test_timeout(self):
+        script_path = self.write_script("import argparse\nwhile True:\n    pass\n")
+        result = asyncio.run(parse_script_async(script_path, timeout=0.5))
+        self.assertIsNone(result.description)
+        self.assertIn(ISOLATED_TECHNIQUE, result.error)
+        self.assertIn("timeout", result.error)
+
+    def test_cancel(self):
+        script_path = self.write_script("import argparse\nwhile True:\n    pass\n")
+
+        async def cancel():
+            task = asyncio.ensure_future(parse_script_async(script_path))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel())
+
+    def test_parse_scripts_async(self):
+        script_paths = [
+            os.path.join(self.script_dir, i)
+            for i in ("choices.py", "error_script.py", "mutually_exclusive.py")
+        ]
+
+        async def collect():
+            return [i async for i in parse_scripts_async(script_paths, workers=2)]
+
+        results = {i.path: i for i in asyncio.run(collect())}
+        self.assertEqual(set(results), set(script_paths))
+        self.assertIsNone(results[script_paths[1]].description)
+        self.assertIn("something_i_dont_have", results[script_paths[1]].error)
+
+
+if __name__ == "__main__":
+    unittest.main()
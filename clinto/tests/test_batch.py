@@ -0,0 +1,112 @@
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+from clinto.batch import parse_script, parse_scripts
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = os.path.split(__file__)[0]
+        self.script_dir = os.path.join(self.base_dir, "argparse_scripts")
+
+    def test_parse_script(self):
+        result = parse_script(os.path.join(self.script_dir, "choices.py"))
+        self.assertEqual(result.error, "")
+        self.assertEqual(result.description["name"], "choices")
+
+    def test_parse_scripts(self):
+        script_paths = [
+            os.path.join(self.script_dir, i)
+            for i in ["choices.py", "error_script.py", "subparser_script.py"]
+        ]
+        results = {i.path: i for i in parse_scripts(script_paths, workers=2)}
+        self.assertEqual(set(results), set(script_paths))
+
+        error_result = results[script_paths[1]]
+        self.assertIsNone(error_result.description)
+        self.assertIn("something_i_dont_have", error_result.error)
+
+        subparser_result = results[script_paths[2]]
+        self.assertIn("subparser1", subparser_result.description["inputs"])
+
+    def test_script_defined_default(self):
+        script_path = os.path.join(self.script_dir, "enum_default.py")
+        (result,) = parse_scripts([script_path], workers=1)
+        self.assertEqual(result.error, "")
+        node = result.description["inputs"][""][0]["nodes"][0]
+        self.assertEqual(node["value"], "Color.RED")
+
+    def test_dead_worker_only_fails_its_script(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        exit_path = os.path.join(temp_dir, "exits.py")
+        with open(exit_path, "w") as f:
+            f.write("import argparse\nimport os\nos._exit(1)\n")
+        script_paths = [exit_path] + [
+            os.path.join(self.script_dir, i)
+            for i in ["choices.py", "mutually_exclusive.py", "subparser_script.py"]
+        ]
+        results = {i.path: i for i in parse_scripts(script_paths, workers=2)}
+        self.assertEqual(set(results), set(script_paths))
+        self.assertIsNone(results[exit_path].description)
+        self.assertIn("BrokenProcessPool", results[exit_path].error)
+        for script_path in script_paths[1:]:
+            self.assertEqual(results[script_path].error, "")
+
+    def test_closing_early_stops_running_scripts(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        slow_path = os.path.join(temp_dir, "slow.py")
+        with open(slow_path, "w") as f:
+            f.write(
+                "import argparse\nimport time\n"
+                "parser = argparse.ArgumentParser()\n"
+                "time.sleep(60)\n"
+                "parser.parse_args()\n"
+            )
+        script_paths = [slow_path, os.path.join(self.script_dir, "choices.py")]
+        results = parse_scripts(script_paths, workers=2)
+        self.assertEqual(next(results).path, script_paths[1])
+        start = time.monotonic()
+        results.close()
+        # The worker still sleeping in slow.py is terminated rather than left to run
+        while multiprocessing.active_children() and time.monotonic() - start < 10:
+            time.sleep(0.1)
+        self.assertEqual(multiprocessing.active_children(), [])
+
+    def test_parse_scripts_with_threads(self):
+        script_paths = [
+            os.path.join(self.script_dir, i)
+            for i in [
+                "choices.py",
+                "function_argtype.py",
+                "mutually_exclusive.py",
+                "subparser_script.py",
+                "data_reader.zip",
+                "zip_app_rel_imports.zip",
+            ]
+        ] * 4
+        expected = dict((i, parse_script(i).description) for i in set(script_paths))
+        sys_path = list(sys.path)
+        results = list(parse_scripts(script_paths, workers=8, use_threads=True))
+        self.assertEqual(len(results), len(script_paths))
+        for result in results:
+            self.assertEqual(result.error, "")
+            self.assertEqual(result.description, expected[result.path])
+        self.assertEqual(sys.path, sys_path)
+
+    def test_parse_args_outside_of_extraction(self):
+        parse_script(os.path.join(self.script_dir, "choices.py"))
+        parser = argparse.ArgumentParser()
+        parser.add_argument("--foo", default="bar")
+        self.assertEqual(parser.parse_args([]).foo, "bar")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from clinto.cache import SpecCache
+from clinto.parser import Parser
+
+
+class TestSpecCache(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = os.path.split(__file__)[0]
+        self.script_dir = os.path.join(self.base_dir, "argparse_scripts")
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.cache = SpecCache(self.cache_dir)
+
+    def test_cache_hit_skips_parsing(self):
+        script_path = os.path.join(self.script_dir, "choices.py")
+        parser = Parser(script_path=script_path, cache=self.cache)
+        self.assertIsNotNone(parser.parser)
+        self.assertEqual(len(self.cache), 1)
+
+        cached = Parser(script_path=script_path, cache=self.cache)
+        self.assertIsNone(cached.parser)
+        self.assertTrue(cached.valid)
+        # Entries are JSON, so sets such as param_action are read back as lists
+        self.assertEqual(cached.get_script_description(), json.loads(parser.json))
+        self.assertEqual(cached.json, parser.json)
+
+    def test_key_includes_ignore_bad_imports(self):
+        script_path = os.path.join(self.script_dir, "choices.py")
+        self.assertNotEqual(
+            self.cache.get_key(script_path),
+            self.cache.get_key(script_path, ignore_bad_imports=True),
+        )
+
+    def test_key_includes_description_options(self):
+        script_path = os.path.join(self.script_dir, "choices.py")
+        keys = set(
+            [
+                self.cache.get_key(script_path),
+                self.cache.get_key(script_path, static=True),
+                self.cache.get_key(script_path, stub_imports=True),
+                self.cache.get_key(script_path, stub_imports=["numpy"]),
+            ]
+        )
+        self.assertEqual(len(keys), 4)
+        self.assertEqual(
+            self.cache.get_key(script_path, stub_imports=["numpy", "pandas"]),
+            self.cache.get_key(script_path, stub_imports=("pandas", "numpy")),
+        )
+
+    def test_script_defined_default(self):
+        script_path = os.path.join(self.script_dir, "enum_default.py")
+        parser = Parser(script_path=script_path, cache=self.cache)
+        self.assertTrue(parser.valid)
+        self.assertEqual(len(self.cache), 1)
+
+        cached = Parser(script_path=script_path, cache=self.cache)
+        self.assertIsNone(cached.parser)
+        node = cached.get_script_description()["inputs"][""][0]["nodes"][0]
+        self.assertEqual(node["value"], "Color.RED")
+
+    def test_failed_write_is_a_miss(self):
+        # The cache directory has gone away
+        script_path = os.path.join(self.script_dir, "choices.py")
+        cache = SpecCache(os.path.join(self.cache_dir, "gone"))
+        os.rmdir(cache.cache_dir)
+        parser = Parser(script_path=script_path, cache=cache)
+        self.assertTrue(parser.valid)
+        self.assertIsNone(cache.get(cache.get_key(script_path)))
+
+    def test_errors_are_not_cached(self):
+        script_path = os.path.join(self.script_dir, "error_script.py")
+        parser = Parser(script_path=script_path, cache=self.cache)
+        self.assertFalse(parser.valid)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_invalidate(self):
+        script_path = os.path.join(self.script_dir, "choices.py")
+        Parser(script_path=script_path, cache=self.cache)
+        Parser(script_path=script_path, cache=self.cache, ignore_bad_imports=True)
+        Parser(script_path=script_path, cache=self.cache, static=True)
+        Parser(
+            script_path=os.path.join(self.script_dir, "subparser_script.py"),
+            cache=self.cache,
+        )
+        self.assertEqual(len(self.cache), 4)
+        self.assertEqual(self.cache.invalidate(script_path=script_path), 3)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_eviction(self):
+        cache = SpecCache(self.cache_dir, max_entries=1)
+        for script in ["choices.py", "subparser_script.py"]:
+            Parser(script_path=os.path.join(self.script_dir, script), cache=cache)
+        self.assertEqual(len(cache), 1)
+        key = cache.get_key(os.path.join(self.script_dir, "subparser_script.py"))
+        self.assertIsNotNone(cache.get(key))
+
+    def test_unreadable_entry_is_a_miss(self):
+        script_path = os.path.join(self.script_dir, "choices.py")
+        key = self.cache.get_key(script_path)
+        with open(os.path.join(self.cache_dir, key + ".spec"), "wb") as f:
+            f.write(b"not json")
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(len(self.cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from clinto.cli import find_scripts, main
+from clinto.parser import Parser
+from clinto.utils import SpecJSONEncoder
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = os.path.split(__file__)[0]
+        self.script_dir = os.path.join(self.base_dir, "argparse_scripts")
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def read_lines(self, path):
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_find_scripts(self):
+        choices = os.path.join(self.script_dir, "choices.py")
+        scripts = list(
+            find_scripts(
+                [choices, self.script_dir, os.path.join(self.script_dir, "*.zip")]
+            )
+        )
+        self.assertEqual(scripts[0], choices)
+        self.assertEqual(len(scripts), len(set(scripts)))
+        self.assertIn(os.path.join(self.script_dir, "data_reader.zip"), scripts)
+        self.assertTrue(all(i.endswith((".py", ".zip")) for i in scripts))
+
+    def test_main(self):
+        output = os.path.join(self.temp_dir, "specs.jsonl")
+        choices = os.path.join(self.script_dir, "choices.py")
+        error_script = os.path.join(self.script_dir, "error_script.py")
+        exit_code = main([choices, error_script, "-o", output, "--jobs", "2"])
+        self.assertEqual(exit_code, 1)
+
+        results = {i["path"]: i for i in self.read_lines(output)}
+        self.assertEqual(set(results), {choices, error_script})
+        self.assertIsNone(results[error_script]["description"])
+        self.assertIn("something_i_dont_have", results[error_script]["error"])
+        expected = json.loads(
+            json.dumps(
+                Parser(script_path=choices).get_script_description(),
+                cls=SpecJSONEncoder,
+            )
+        )
+        self.assertEqual(results[choices]["description"], expected)
+
+    def test_cache_dir(self):
+        output = os.path.join(self.temp_dir, "specs.jsonl")
+        cache_dir = os.path.join(self.temp_dir, "cache")
+        choices = os.path.join(self.script_dir, "choices.py")
+        self.assertEqual(main([choices, "-o", output, "--cache-dir", cache_dir]), 0)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+
+class TestSpecJSONEncoder(unittest.TestCase):
+    def test_sets(self):
+        self.assertEqual(
+            json.dumps({"param_action": {"b", "a"}}, cls=SpecJSONEncoder),
+            '{"param_action": ["a", "b"]}',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
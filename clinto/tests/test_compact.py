@@ -0,0 +1,38 @@
+import os
+import unittest
+
+from clinto.compact import CompactNode, from_description, to_description
+from clinto.parser import Parser
+
+
+class TestCompact(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = os.path.split(__file__)[0]
+        self.script_dir = os.path.join(self.base_dir, "argparse_scripts")
+
+    def test_round_trip(self):
+        for script in ("choices.py", "mutually_exclusive.py", "subparser_script.py"):
+            script_path = os.path.join(self.script_dir, script)
+            description = Parser(script_path=script_path).get_script_description()
+            compacted = from_description(description)
+            self.assertIsInstance(compacted, CompactNode)
+            self.assertEqual(to_description(compacted), description)
+
+    def test_nodes_share_keys_and_strings(self):
+        script_path = os.path.join(self.script_dir, "choices.py")
+        description = Parser(script_path=script_path).get_script_description()
+        compacted = from_description(description)
+        nodes = [node for group in compacted["inputs"][""] for node in group["nodes"]]
+        self.assertGreater(len(nodes), 1)
+        self.assertIs(nodes[0]._layout, nodes[1]._layout)
+        self.assertIs(nodes[0]["model"], nodes[1]["model"])
+        self.assertEqual(nodes[0]["name"], "first_pos")
+        self.assertEqual(dict(nodes[0]), to_description(nodes[0]))
+        with self.assertRaises(KeyError):
+            nodes[0]["missing"]
+        with self.assertRaises(TypeError):
+            nodes[0]["name"] = "changed"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import enum
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from clinto.parser import Parser
+from clinto.utils import to_plain_data
+
+SCRIPT = """
+import argparse
+import detached_helper
+
+parser = argparse.ArgumentParser(description="Detached")
+parser.add_argument("--mode", default=detached_helper.DEFAULT_MODE)
+parser.add_argument("--level", type=int, default=detached_helper.Level.HIGH)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+"""
+
+HELPER = """
+import enum
+
+DEFAULT_MODE = "fast"
+
+
+class Level(enum.IntEnum):
+    HIGH = 2
+"""
+
+
+class TestDetached(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.script_path = os.path.join(self.temp_dir, "detached_script.py")
+        with open(self.script_path, "w") as f:
+            f.write(SCRIPT)
+        with open(os.path.join(self.temp_dir, "detached_helper.py"), "w") as f:
+            f.write(HELPER)
+        self.addCleanup(sys.modules.pop, "detached_helper", None)
+
+    def test_detached(self):
+        parser = Parser(script_path=self.script_path, detached=True)
+        self.assertTrue(parser.valid)
+        self.assertEqual(parser.error, "")
+        self.assertIsNone(parser.parser)
+        self.assertNotIn("detached_helper", sys.modules)
+
+        nodes = parser.get_script_description()["inputs"][""][0]["nodes"]
+        self.assertEqual(nodes[0]["value"], "fast")
+        # Objects defined by the script are not kept alive
+        self.assertEqual(type(nodes[1]["value"]), str)
+
+    def test_keeps_imports_of_other_threads(self):
+        with open(os.path.join(self.temp_dir, "thread_helper.py"), "w") as f:
+            f.write("VALUE = 1\n")
+        self.addCleanup(sys.modules.pop, "thread_helper", None)
+        colorsys = sys.modules.pop("colorsys", None)
+        if colorsys is not None:
+            self.addCleanup(sys.modules.__setitem__, "colorsys", colorsys)
+        with open(self.script_path, "w") as f:
+            f.write(
+                "import colorsys\n"
+                "import threading\n"
+                "thread = threading.Thread(target=__import__, args=('thread_helper',))\n"
+                "thread.start()\n"
+                "thread.join()\n" + SCRIPT
+            )
+        sys.path.insert(0, self.temp_dir)
+        self.addCleanup(sys.path.remove, self.temp_dir)
+
+        parser = Parser(script_path=self.script_path, detached=True)
+        self.assertTrue(parser.valid)
+        self.assertNotIn("detached_helper", sys.modules)
+        self.assertIn("thread_helper", sys.modules)
+        self.assertIn("colorsys", sys.modules)
+
+    def test_to_plain_data(self):
+        class Color(enum.Enum):
+            RED = 1
+
+        data = {"a": [1, (2.0, "b")], "c": {None, True}, "d": Color.RED}
+        plain = to_plain_data(data)
+        self.assertEqual(
+            plain, {"a": [1, (2.0, "b")], "c": {None, True}, "d": "Color.RED"}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
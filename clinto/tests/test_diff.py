@@ -0,0 +1,61 @@
+import copy
+import os
+import unittest
+
+from clinto.compact import from_description
+from clinto.diff import diff_specs
+from clinto.parser import Parser
+
+
+class TestDiffSpecs(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = os.path.split(__file__)[0]
+        script_path = os.path.join(self.base_dir, "argparse_scripts", "choices.py")
+        self.spec = Parser(script_path=script_path).get_script_description()
+
+    def test_unchanged(self):
+        diff = diff_specs(self.spec, copy.deepcopy(self.spec))
+        self.assertFalse(diff.changed)
+        self.assertFalse(diff_specs(self.spec, from_description(self.spec)).changed)
+
+    def test_changes(self):
+        new = copy.deepcopy(self.spec)
+        new["version"] = "4"
+        positional, options = new["inputs"][""]
+        removed = positional["nodes"].pop(0)
+        options["nodes"][0]["help"] = "Pick one"
+        added = dict(options["nodes"][0], param="--extra", name="extra")
+        options["nodes"].append(added)
+        new["inputs"]["sub"] = [{"group": "options", "nodes": []}]
+
+        diff = diff_specs(self.spec, new)
+        self.assertTrue(diff.changed)
+        self.assertEqual(diff.script.modified, {"version": ("3", "4")})
+        self.assertEqual(diff.subparsers.added, ["sub"])
+        self.assertEqual(diff.subparsers.modified, [""])
+        self.assertEqual(diff.groups.added, [("sub", "options")])
+        self.assertEqual(
+            diff.groups.modified,
+            [("", positional["group"]), ("", options["group"])],
+        )
+        self.assertEqual(dict(diff.parameters.added), {("", "--extra"): added})
+        self.assertEqual(dict(diff.parameters.removed), {("", "first_pos"): removed})
+        self.assertEqual(
+            dict(diff.parameters.modified),
+            {("", "--one-choice"): {"help": (None, "Pick one")}},
+        )
+
+    def test_moved_between_groups(self):
+        new = copy.deepcopy(self.spec)
+        positional, options = new["inputs"][""]
+        options["nodes"].append(positional["nodes"].pop())
+        diff = diff_specs(self.spec, new)
+        self.assertEqual(
+            dict(diff.parameters.modified),
+            {("", "second-pos"): {"group": (positional["group"], options["group"])}},
+        )
+        self.assertFalse(diff.parameters.added or diff.parameters.removed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from clinto.cache import get_cache_key
+from clinto.fingerprint import find_local_imports, fingerprint_script
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.script_path = self.write(
+            "script.py",
+            "import argparse\n"
+            "from helpers import build_parser\n"
+            "def main():\n"
+            "    import pkg.options\n",
+        )
+        self.write("helpers.py", "def build_parser():\n    pass\n")
+        self.write("pkg/__init__.py", "")
+        self.write("pkg/options.py", "from .choices import CHOICES\n")
+        self.write("pkg/choices.py", "CHOICES = [1, 2]\n")
+        self.write("unrelated.py", "")
+
+    def write(self, name, source):
+        path = os.path.join(self.temp_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(source)
+        return path
+
+    def test_find_local_imports(self):
+        with open(self.script_path) as f:
+            files = find_local_imports(self.script_path, f.read(), self.temp_dir)
+        self.assertEqual(
+            [os.path.relpath(i, self.temp_dir) for i in files],
+            [
+                "helpers.py",
+                os.path.join("pkg", "__init__.py"),
+                os.path.join("pkg", "options.py"),
+            ],
+        )
+
+    def test_transitive_changes(self):
+        fingerprint = fingerprint_script(self.script_path)
+        key = get_cache_key(self.script_path)
+
+        self.write("unrelated.py", "x = 1\n")
+        self.assertEqual(fingerprint_script(self.script_path), fingerprint)
+
+        self.write("pkg/choices.py", "CHOICES = [1, 2, 3]\n")
+        self.assertNotEqual(fingerprint_script(self.script_path), fingerprint)
+        self.assertNotEqual(get_cache_key(self.script_path), key)
+
+    def test_zip_metadata(self):
+        zip_path = os.path.join(self.temp_dir, "app.zip")
+
+        def build(choices):
+            with zipfile.ZipFile(zip_path, "w") as archive:
+                archive.writestr("__main__.py", "from choices import CHOICES\n")
+                archive.writestr("choices.py", choices)
+            return fingerprint_script(zip_path)
+
+        fingerprint = build("CHOICES = [1, 2]\n")
+        self.assertEqual(build("CHOICES = [1, 2]\n"), fingerprint)
+        self.assertNotEqual(build("CHOICES = [1, 3]\n"), fingerprint)
+
+
+if __name__ == "__main__":
+    unittest.main()
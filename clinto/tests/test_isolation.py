@@ -0,0 +1,62 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from clinto.isolation import ISOLATED_TECHNIQUE
+from clinto.parser import Parser
+
+
+class TestIsolation(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = os.path.split(__file__)[0]
+        self.script_dir = os.path.join(self.base_dir, "argparse_scripts")
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def write_script(self, source):
+        script_path = os.path.join(self.temp_dir, "script.py")
+        with open(script_path, "w") as f:
+            f.write(source)
+        return script_path
+
+    def test_isolated_parse(self):
+        script_path = os.path.join(self.script_dir, "choices.py")
+        parser = Parser(script_path=script_path, isolated=True)
+        self.assertTrue(parser.valid)
+        self.assertEqual(
+            parser.get_script_description(),
+            Parser(script_path=script_path).get_script_description(),
+        )
+
+    def test_script_defined_default(self):
+        script_path = os.path.join(self.script_dir, "enum_default.py")
+        parser = Parser(script_path=script_path, isolated=True)
+        self.assertTrue(parser.valid, parser.error)
+        node = parser.get_script_description()["inputs"][""][0]["nodes"][0]
+        self.assertEqual(node["value"], "Color.RED")
+
+    def test_isolated_error(self):
+        script_path = os.path.join(self.script_dir, "error_script.py")
+        parser = Parser(script_path=script_path, isolated=True)
+        self.assertFalse(parser.valid)
+        self.assertIn("something_i_dont_have", parser.error)
+
+    def test_timeout(self):
+        script_path = self.write_script("import argparse\nwhile True:\n    pass\n")
+        parser = Parser(script_path=script_path, timeout=0.5)
+        self.assertFalse(parser.valid)
+        self.assertIn(ISOLATED_TECHNIQUE, parser.error)
+        self.assertIn("timeout", parser.error)
+
+    @unittest.skipIf(sys.platform == "win32", "Resource limits require POSIX")
+    def test_cpu_time_limit(self):
+        script_path = self.write_script("import argparse\nwhile True:\n    pass\n")
+        parser = Parser(script_path=script_path, cpu_time_limit=1, timeout=30)
+        self.assertFalse(parser.valid)
+        self.assertIn("CPU time limit", parser.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
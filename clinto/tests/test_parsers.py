@@ -1,12 +1,29 @@
+import _ast
 import argparse
+import ast
+import gc
+import io
+import json
 import os
+import shutil
+import sys
+import tempfile
 import unittest
+import weakref
+import zipfile
+from collections import OrderedDict, defaultdict, namedtuple
+from unittest import mock
 
 from . import factories
 from clinto.version import PY_MINOR_VERSION, PY36
 from clinto.parsers.argparse_ import ArgParseNode, expand_iterable
+from clinto.parsers import argparse_, constants, docopt_
 from clinto.parsers.constants import SPECIFY_EVERY_PARAM
+from clinto.ast import source_parser
 from clinto.parser import Parser
+from clinto.parsers import DocOptParser
+from clinto.parsers.base import load_module_from_path
+from clinto.utils import dump_json, truncate_value
 
 _parser = argparse.ArgumentParser()
 OPTIONAL_TITLE = _parser._optionals.title
@@ -70,6 +87,128 @@ class TestArgParse(unittest.TestCase):
         assert rangefield.node_attrs["choices"] == expand_iterable(
             self.parser.rangefield.choices
         )
+        assert "choices_truncated" not in rangefield.node_attrs
+
+    def test_field_type_resolution_is_cached(self):
+        class Path(str):
+            pass
+
+        parser = argparse.ArgumentParser()
+        actions = [parser.add_argument("--p{0}".format(i), type=Path) for i in range(3)]
+        cache = weakref.WeakKeyDictionary()
+        with mock.patch.object(argparse_, "_field_type_cache", cache):
+            nodes = [ArgParseNode(action=i) for i in actions]
+            self.assertEqual(list(cache), [type])
+            self.assertEqual(list(cache[type]), [argparse._StoreAction])
+        self.assertEqual(nodes[0].node_attrs["model"], "CharField")
+
+    def test_field_type_cache_releases_classes(self):
+        class Upper(object):
+            def __call__(self, value):
+                return value.upper()
+
+        parser = argparse.ArgumentParser()
+        action = parser.add_argument("--name", type=Upper())
+        self.assertEqual(ArgParseNode(action=action).node_attrs["model"], "CharField")
+        self.assertIn(Upper, argparse_._field_type_cache)
+
+        upper_ref = weakref.ref(Upper)
+        del parser, action, Upper
+        gc.collect()
+        self.assertIsNone(upper_ref())
+
+    def test_register_type_field(self):
+        class Color(object):
+            def __call__(self, value):
+                return value
+
+        parser = argparse.ArgumentParser()
+        action = parser.add_argument("--color", type=Color())
+        self.assertEqual(ArgParseNode(action=action).node_attrs["model"], "CharField")
+
+        type_fields = dict(argparse_.TYPE_FIELDS)
+        self.addCleanup(argparse_.TYPE_FIELDS.update, type_fields)
+        self.addCleanup(argparse_.TYPE_FIELDS.clear)
+        self.addCleanup(argparse_._field_type_cache.clear)
+        argparse_.register_type_field(Color, {"model": "ColorField", "type": "color"})
+        attrs = ArgParseNode(action=action).node_attrs
+        self.assertEqual(attrs["model"], "ColorField")
+        self.assertEqual(attrs["type"], "color")
+        self.assertEqual(attrs["name"], "color")
+
+    def test_huge_choices_and_defaults(self):
+        parser = argparse.ArgumentParser()
+        # A metavar keeps argparse from formatting every choice itself
+        huge_range = parser.add_argument(
+            "--range", choices=range(0, 10**9, 3), metavar="N"
+        )
+        huge_list = parser.add_argument(
+            "--list", choices=list(range(5000)), default=list(range(10**6))
+        )
+
+        attrs = ArgParseNode(action=huge_range).node_attrs
+        self.assertEqual(attrs["choices"], list(range(0, 3000, 3)))
+        self.assertTrue(attrs["choices_truncated"])
+        self.assertEqual(attrs["choices_count"], len(range(0, 10**9, 3)))
+        self.assertEqual(attrs["choices_range"], {"start": 0, "stop": 10**9, "step": 3})
+
+        # Longer than sys.maxsize, so len() cannot be used
+        endless_range = parser.add_argument(
+            "--endless", choices=range(10**20, 0, -7), metavar="N"
+        )
+        attrs = ArgParseNode(action=endless_range).node_attrs
+        self.assertEqual(len(attrs["choices"]), 1000)
+        self.assertEqual(attrs["choices_count"], (10**20 + 6) // 7)
+        self.assertEqual(
+            attrs["choices_range"], {"start": 10**20, "stop": 0, "step": -7}
+        )
+
+        attrs = ArgParseNode(action=huge_list).node_attrs
+        self.assertEqual(len(attrs["choices"]), 1000)
+        self.assertEqual(attrs["choices_count"], 5000)
+        self.assertNotIn("choices_range", attrs)
+        self.assertEqual(attrs["value"], list(range(1000)))
+        self.assertTrue(attrs["value_truncated"])
+        self.assertEqual(attrs["value_count"], 10**6)
+
+        with mock.patch.object(constants, "MAX_CHOICES", None):
+            attrs = ArgParseNode(action=huge_list).node_attrs
+        self.assertEqual(len(attrs["choices"]), 5000)
+        self.assertNotIn("choices_truncated", attrs)
+
+    def test_truncating_unsized_choices_and_container_subclasses(self):
+        parser = argparse.ArgumentParser()
+        generated = parser.add_argument(
+            "--generated", choices=(i for i in range(5000)), metavar="N"
+        )
+        attrs = ArgParseNode(action=generated).node_attrs
+        self.assertEqual(attrs["choices"], list(range(1000)))
+        self.assertTrue(attrs["choices_truncated"])
+        self.assertNotIn("choices_count", attrs)
+
+        exact = parser.add_argument(
+            "--exact", choices=(i for i in range(1000)), metavar="N"
+        )
+        attrs = ArgParseNode(action=exact).node_attrs
+        self.assertEqual(len(attrs["choices"]), 1000)
+        self.assertNotIn("choices_truncated", attrs)
+
+        Point = namedtuple("Point", ["x", "y"])
+        for default, expected in (
+            (defaultdict(int, ((i, i) for i in range(2000))), dict),
+            (OrderedDict((i, i) for i in range(2000)), dict),
+            (tuple(Point(i, i) for i in range(2000)), tuple),
+            (type("Names", (list,), {})(range(2000)), list),
+            (frozenset(range(2000)), frozenset),
+        ):
+            action = argparse.ArgumentParser().add_argument(
+                "--default", default=default
+            )
+            attrs = ArgParseNode(action=action).node_attrs
+            self.assertIs(type(attrs["value"]), expected)
+            self.assertEqual(len(attrs["value"]), 1000)
+            self.assertEqual(attrs["value_count"], 2000)
+        self.assertIs(type(truncate_value(Point(1, 2), 1)), tuple)
 
     def test_argparse_script(self):
         script_path = os.path.join(self.script_dir, "choices.py")
@@ -243,6 +382,50 @@ class TestArgParse(unittest.TestCase):
         parser = Parser(script_path=script_path)
         self.assertIsNotNone(parser.get_script_description())
 
+    def test_zipapp_is_not_extracted(self):
+        script_path = os.path.join(self.script_dir, "zip_app_rel_imports.zip")
+        with mock.patch("zipfile.ZipFile.extractall") as extractall:
+            parser = Parser(script_path=script_path)
+        extractall.assert_not_called()
+        self.assertEqual(
+            parser.get_script_description()["path"],
+            os.path.join(script_path, "__main__.py"),
+        )
+
+    def test_zipapp_reading_bundled_files(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        script_path = os.path.join(temp_dir, "config_reader.zip")
+        with zipfile.ZipFile(script_path, "w") as archive:
+            archive.writestr("config.json", json.dumps({"modes": ["fast", "slow"]}))
+            archive.writestr(
+                "__main__.py",
+                "import argparse\n"
+                "import json\n"
+                "import os\n"
+                "CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config.json')\n"
+                "with open(CONFIG_PATH) as f:\n"
+                "    CONFIG = json.load(f)\n"
+                "parser = argparse.ArgumentParser()\n"
+                "parser.add_argument('--mode', choices=CONFIG['modes'])\n"
+                "parser.parse_args()\n",
+            )
+        with mock.patch("tempfile.mkdtemp", return_value=os.path.join(temp_dir, "x")):
+            parser = Parser(script_path=script_path)
+        self.assertTrue(parser.valid, parser.error)
+        description = parser.get_script_description()
+        self.assertEqual(description["path"], os.path.join(script_path, "__main__.py"))
+        self.assertEqual(
+            description["inputs"][""][0]["nodes"][0]["choices"], ["fast", "slow"]
+        )
+        # The extraction is removed afterwards
+        self.assertEqual(os.listdir(temp_dir), ["config_reader.zip"])
+
+    def test_load_module_from_zip(self):
+        script_path = os.path.join(self.script_dir, "data_reader.zip", "__main__.py")
+        module = load_module_from_path("__name__", script_path)
+        self.assertIsInstance(module.parser, argparse.ArgumentParser)
+
     def test_mutually_exclusive_groups(self):
         script_path = os.path.join(self.script_dir, "mutually_exclusive.py")
         parser = Parser(script_path=script_path)
@@ -315,6 +498,235 @@ class TestArgParse(unittest.TestCase):
         for technique in ["ast-parser", "source-loader", "try-catch"]:
             self.assertIn(technique, parser.error)
 
+    def test_json_is_memoized(self):
+        script_path = os.path.join(self.script_dir, "choices.py")
+        parser = Parser(script_path=script_path)
+        self.assertIs(parser.get_script_description(), parser.get_script_description())
+        self.assertIs(parser.json, parser.json)
+        self.assertEqual(
+            json.loads(parser.json)["inputs"][""][1]["nodes"][0]["param_action"], []
+        )
+
+    def test_dump_json(self):
+        script_path = os.path.join(self.script_dir, "choices.py")
+        for detached in (False, True):
+            parser = Parser(script_path=script_path, detached=detached)
+            output = io.StringIO()
+            parser.dump_json(output)
+            self.assertEqual(output.getvalue(), parser.json)
+
+        output = io.StringIO()
+        dump_json({"nodes": [{"param_action": {"b", "a"}}] * 100}, output, chunk_size=8)
+        self.assertEqual(
+            json.loads(output.getvalue()),
+            {"nodes": [{"param_action": ["a", "b"]}] * 100},
+        )
+
+
+class TestStaticArgParse(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = os.path.split(__file__)[0]
+        self.script_dir = os.path.join(self.base_dir, "argparse_scripts")
+
+    def test_matches_executed_description(self):
+        for script in [
+            "choices.py",
+            "function_argtype.py",
+            "mutually_exclusive.py",
+            "subparser_script.py",
+        ]:
+            script_path = os.path.join(self.script_dir, script)
+            static_parser = Parser(script_path=script_path, static=True)
+            exec_parser = Parser(script_path=script_path)
+            self.assertEqual(
+                static_parser.get_script_description(),
+                exec_parser.get_script_description(),
+                script,
+            )
+
+    def test_does_not_import(self):
+        script_path = os.path.join(self.script_dir, "error_script.py")
+        parser = Parser(script_path=script_path, static=True)
+        self.assertEqual("", parser.error)
+        nodes = parser.get_script_description()["inputs"][""][0]["nodes"]
+        self.assertEqual([i["name"] for i in nodes], ["foo"])
+
+    def test_falls_back_when_statements_are_skipped(self):
+        script_path = os.path.join(self.script_dir, "partial_static.py")
+        with open(script_path) as f:
+            with self.assertRaises(source_parser.StaticEvaluationError):
+                source_parser.build_argparse_parser(f.read())
+
+        static_parser = Parser(script_path=script_path, static=True)
+        nodes = static_parser.get_script_description()["inputs"][""][0]["nodes"]
+        self.assertEqual([i["name"] for i in nodes], ["a", "b", "c", "verbose", "d"])
+
+    def test_reading_the_parser_in_skipped_statements(self):
+        source = (
+            "import argparse\n"
+            "parser = argparse.ArgumentParser()\n"
+            "parser.add_argument('--foo')\n"
+            "if __name__ == '__main__':\n"
+            "    args = vars(parser.parse_args())\n"
+            "    if not args['foo']:\n"
+            "        parser.error('--foo is required')\n"
+        )
+        parser = source_parser.build_argparse_parser(source)
+        self.assertEqual(parser._actions[-1].dest, "foo")
+
+    def test_unresolvable_values(self):
+        source = (
+            "import argparse\n"
+            "from settings import DEFAULT\n"
+            "parser = argparse.ArgumentParser()\n"
+            "parser.add_argument('--foo', default=DEFAULT)\n"
+        )
+        with self.assertRaises(source_parser.StaticEvaluationError):
+            source_parser.build_argparse_parser(source)
+
+    def test_unused_unresolvable_values(self):
+        source = (
+            "import argparse\n"
+            "import settings\n"
+            "TIMEOUT = settings.TIMEOUT * 2\n"
+            "parser = argparse.ArgumentParser(description='Test')\n"
+            "parser.add_argument('--count', type=int, default=-1)\n"
+        )
+        parser = source_parser.build_argparse_parser(source)
+        self.assertEqual(parser.description, "Test")
+        self.assertEqual(parser._actions[-1].default, -1)
+
+    def test_bounds_the_size_of_values(self):
+        for value in [
+            '"a" * 10**10',
+            "10**10**10",
+            "[0] * 2**30",
+            "list(range(10**12))",
+            "1 / 0",
+        ]:
+            source = (
+                "import argparse\n"
+                "parser = argparse.ArgumentParser()\n"
+                "parser.add_argument('--foo', default={0})\n".format(value)
+            )
+            with self.assertRaises(source_parser.StaticEvaluationError, msg=value):
+                source_parser.build_argparse_parser(source)
+
+        source = (
+            "import argparse\n"
+            "UNUSED = 'a' * 10**10\n"
+            "parser = argparse.ArgumentParser()\n"
+            "parser.add_argument('--foo', choices=range(10**12), metavar='N',\n"
+            "                    default=3 * 'ab')\n"
+        )
+        parser = source_parser.build_argparse_parser(source)
+        self.assertEqual(parser._actions[-1].choices, range(10**12))
+        self.assertEqual(parser._actions[-1].default, "ababab")
+
+
+class TestFindValidImports(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        package_dir = os.path.join(self.temp_dir, "side_effect_package")
+        os.mkdir(package_dir)
+        for name in ["__init__.py", "submodule.py"]:
+            with open(os.path.join(package_dir, name), "w") as f:
+                f.write("raise RuntimeError('This should never be executed')\n")
+        sys.path.insert(0, self.temp_dir)
+        self.addCleanup(sys.path.remove, self.temp_dir)
+
+    def test_does_not_execute_imports(self):
+        imports = ast.parse(
+            "import side_effect_package.submodule\n"
+            "from side_effect_package import submodule\n"
+            "import side_effect_package.missing\n"
+            "import something_i_dont_have\n"
+            "from . import relative\n"
+        ).body
+        valid_imports = source_parser.find_valid_imports(imports)
+        self.assertEqual(valid_imports, imports[:2])
+        self.assertNotIn("side_effect_package", sys.modules)
+
+    def test_guards_names_imported_from_modules(self):
+        imports = ast.parse(
+            "from os import path, this_name_does_not_exist\n"
+            "from side_effect_package import *\n"
+        ).body
+        valid_imports = source_parser.find_valid_imports(imports)
+        self.assertEqual(len(valid_imports), 3)
+        self.assertEqual([i.name for i in valid_imports[0].names], ["path"])
+        self.assertIsInstance(valid_imports[1], ast.Try)
+        self.assertIs(valid_imports[2], imports[1])
+
+        script_path = os.path.join(self.temp_dir, "missing_name.py")
+        with open(script_path, "w") as f:
+            f.write(
+                "import argparse\n"
+                "from os import this_name_does_not_exist\n"
+                "parser = argparse.ArgumentParser()\n"
+                "parser.add_argument('--foo')\n"
+                "args = parser.parse_args()\n"
+            )
+        parser = Parser(script_path=script_path, ignore_bad_imports=True)
+        self.assertEqual(parser.error, "")
+        nodes = parser.get_script_description()["inputs"][""][0]["nodes"]
+        self.assertEqual([i["name"] for i in nodes], ["foo"])
+
+    def test_memoizes_lookups(self):
+        self.assertTrue(source_parser.is_module_resolvable("side_effect_package"))
+        self.assertIn(
+            ("side_effect_package", tuple(sys.path)),
+            source_parser._resolvable_modules,
+        )
+
+
+class TestSourceIndex(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = os.path.split(__file__)[0]
+        self.script_dir = os.path.join(self.base_dir, "argparse_scripts")
+
+    def test_matches_tree_walks(self):
+        source = (
+            "from argparse import ArgumentParser\n"
+            "PROG = 'prog'\n"
+            "DESCRIPTION = 'A description'\n"
+            "parser = ArgumentParser(prog=PROG, description=DESCRIPTION)\n"
+            "group = parser.add_argument_group('Group')\n"
+            "group.add_argument('--foo', default=PROG)\n"
+            "if __name__ == '__main__':\n"
+            "    args = parser.parse_args()\n"
+        )
+        sources = [source]
+        for script in os.listdir(self.script_dir):
+            if script.endswith(".py"):
+                with open(os.path.join(self.script_dir, script)) as f:
+                    sources.append(f.read())
+
+        for source in sources:
+            nodes = ast.parse(source)
+            index = source_parser.SourceIndex(nodes)
+            for node_type in [_ast.Import, _ast.ImportFrom, _ast.Assign, _ast.Call]:
+                self.assertEqual(
+                    index.get_nodes_by_instance_type(node_type),
+                    source_parser.get_nodes_by_instance_type(nodes, node_type),
+                )
+            assignments = source_parser.get_nodes_by_instance_type(nodes, _ast.Assign)
+            calls = source_parser.get_nodes_by_instance_type(nodes, _ast.Call)
+            for node_type, objs in [(_ast.Assign, assignments), (_ast.Call, calls)]:
+                for attr in ["ArgumentParser", "add_argument", "parse_args", "parser"]:
+                    selected = index.get_nodes_by_containing_attr(node_type, attr)
+                    self.assertEqual(
+                        selected,
+                        source_parser.get_nodes_by_containing_attr(objs, attr),
+                    )
+                    self.assertEqual(
+                        index.get_node_args_and_keywords(selected, attr),
+                        source_parser.get_node_args_and_keywords(
+                            assignments, selected, attr
+                        ),
+                    )
+
 
 class TestDocOpt(unittest.TestCase):
     def setUp(self):
@@ -359,6 +771,90 @@ class TestDocOpt(unittest.TestCase):
             },
         )
 
+    def test_naval_fate_arguments_and_commands(self):
+        script_path = os.path.join(self.script_dir, "naval_fate.py")
+        parser = Parser(script_path=script_path)
+        arguments, commands = parser.get_script_description()["inputs"][""][1:]
+        self.assertEqual(arguments["group"], "arguments")
+        self.assertEqual([i["name"] for i in arguments["nodes"]], ["name", "x", "y"])
+        self.assertEqual(arguments["nodes"][0]["choice_limit"], ">=1")
+        self.assertEqual(commands["group"], "commands")
+        self.assertEqual(
+            [i["name"] for i in commands["nodes"]],
+            ["ship", "new", "move", "shoot", "mine", "set", "remove"],
+        )
+
+    def test_does_not_execute_script(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        script_path = os.path.join(temp_dir, "script.py")
+        with open(script_path, "w") as f:
+            f.write(
+                '"""Usage: script.py <input> [--count=<n>]"""\n'
+                "import docopt\n"
+                "raise RuntimeError('executed')\n"
+            )
+        with open(script_path) as f:
+            parser = DocOptParser(script_path=script_path, script_source=f.read())
+        self.assertTrue(parser.is_valid)
+        nodes = [
+            node["name"]
+            for group in parser.get_script_description()["inputs"][""]
+            for node in group["nodes"]
+        ]
+        self.assertEqual(nodes, ["count", "input"])
+
+    def test_usage_docstring_without_docopt(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        script_path = os.path.join(temp_dir, "frob.py")
+        with open(script_path, "w") as f:
+            f.write(
+                '"""Usage: frob.py [--fast] <file>"""\n'
+                "import argparse\n"
+                "import something_i_dont_have\n"
+                "parser = argparse.ArgumentParser(description=__doc__)\n"
+                "parser.add_argument('--level', type=int)\n"
+                "parser.parse_args()\n"
+            )
+        parser = Parser(script_path=script_path)
+        self.assertFalse(parser.valid)
+        self.assertIn("something_i_dont_have", parser.error)
+
+    def test_parsed_docstrings_are_cached(self):
+        doc = "Usage: script.py <input> [--count=<n>]"
+        with mock.patch.object(docopt_, "_docopt_cache", OrderedDict()) as cache:
+            parsed = docopt_.parse_docopt(doc)
+            self.assertIs(docopt_.parse_docopt(doc), parsed)
+            with mock.patch.object(docopt_, "DOCOPT_CACHE_SIZE", 1):
+                docopt_.parse_docopt("Usage: other.py <output>")
+            self.assertEqual(len(cache), 1)
+            self.assertIsNot(docopt_.parse_docopt(doc), parsed)
+
+        script_path = os.path.join(self.script_dir, "naval_fate.py")
+        for _ in range(2):
+            Parser(script_path=script_path)
+        with open(script_path) as f:
+            options, _ = docopt_.parse_docopt(docopt_.get_module_docstring(f.read()))
+        self.assertFalse(any(hasattr(i, "type") for i in options))
+
+
+class TestParserSelection(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = os.path.split(__file__)[0]
+
+    def test_scores_without_instantiating(self):
+        source = "import argparse\nparser = argparse.ArgumentParser()\n"
+        self.assertEqual(DocOptParser.calculate_score("script.py", source), 1.0 / 3)
+        self.assertEqual(DocOptParser.calculate_score("script.txt", source), 0.0)
+
+    def test_stops_at_first_valid_parser(self):
+        script_path = os.path.join(self.base_dir, "argparse_scripts", "choices.py")
+        with mock.patch.object(DocOptParser, "extract_parser") as extract_parser:
+            parser = Parser(script_path=script_path)
+        self.assertTrue(parser.valid)
+        extract_parser.assert_not_called()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,125 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from clinto import scanner
+from clinto.scanner import Scanner
+
+SCRIPT = """import argparse
+from options import HELP
+parser = argparse.ArgumentParser()
+parser.add_argument("--{0}", help=HELP)
+parser.parse_args()
+"""
+
+
+class TestScanner(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.script_dir = os.path.join(self.temp_dir, "scripts")
+        os.makedirs(self.script_dir)
+        self.manifest_path = os.path.join(self.temp_dir, "manifest.pickle")
+        self.first = self.write("first.py", SCRIPT.format("first"))
+        self.second = self.write("second.py", SCRIPT.format("second"))
+        self.write("options.py", "HELP = 'Some help'\n")
+
+    def write(self, name, source):
+        path = os.path.join(self.script_dir, name)
+        with open(path, "w") as f:
+            f.write(source)
+        # Make sure the modification time changes, however coarse it is
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        return path
+
+    def get_scanner(self, **kwargs):
+        return Scanner(self.manifest_path, [self.script_dir], workers=2, **kwargs)
+
+    def test_incremental_scans(self):
+        result = self.get_scanner().scan()
+        self.assertIn(self.first, result.added)
+        self.assertIn(self.second, result.added)
+        self.assertEqual(
+            self.get_scanner().get_description(self.first)["inputs"][""][0]["nodes"][0][
+                "help"
+            ],
+            "Some help",
+        )
+
+        # A new scanner picks up the manifest, and parses nothing
+        with mock.patch.object(scanner, "parse_scripts", return_value=[]) as parse:
+            result = self.get_scanner().scan()
+        self.assertFalse(result.changed)
+        self.assertEqual(parse.call_args[0][0], [])
+
+        self.write("second.py", SCRIPT.format("changed"))
+        os.remove(self.first)
+        result = self.get_scanner().scan()
+        self.assertEqual(result.modified, [self.second])
+        self.assertEqual(result.removed, [self.first])
+
+    def test_imported_module_changes(self):
+        self.get_scanner().scan()
+        self.write("options.py", "HELP = 'Other help'\n")
+        result = self.get_scanner().scan()
+        self.assertIn(self.first, result.modified)
+        self.assertIn(self.second, result.modified)
+        self.assertEqual(
+            self.get_scanner().get_description(self.first)["inputs"][""][0]["nodes"][0][
+                "help"
+            ],
+            "Other help",
+        )
+
+    def test_touched_files_are_not_parsed(self):
+        self.get_scanner().scan()
+        with open(self.first) as f:
+            self.write("first.py", f.read())
+        with mock.patch.object(scanner, "parse_scripts", return_value=[]) as parse:
+            result = self.get_scanner().scan()
+        self.assertFalse(result.changed)
+        self.assertEqual(parse.call_args[0][0], [])
+
+    def test_retry_failed(self):
+        # A dependency that is not a local module, and is installed after the first scan
+        dependency_dir = os.path.join(self.temp_dir, "site")
+        os.makedirs(dependency_dir)
+        sys.path.append(dependency_dir)
+        self.addCleanup(sys.path.remove, dependency_dir)
+        script = self.write(
+            "needs_dependency.py",
+            "import argparse\n"
+            "import scanner_dependency\n"
+            "parser = argparse.ArgumentParser()\n"
+            "parser.add_argument('--value')\n",
+        )
+        self.get_scanner().scan()
+        self.assertIsNone(self.get_scanner().get_description(script))
+
+        with open(os.path.join(dependency_dir, "scanner_dependency.py"), "w") as f:
+            f.write("")
+        self.get_scanner().scan()
+        self.assertIsNone(self.get_scanner().get_description(script))
+
+        result = self.get_scanner(retry_failed=True).scan()
+        self.assertEqual(result.modified, [script])
+        self.assertIsNotNone(self.get_scanner().get_description(script))
+        # options.py is not a CLI, and still failing it is not reported as changed
+        self.assertFalse(self.get_scanner(retry_failed=True).scan().changed)
+
+    def test_watch(self):
+        watcher = self.get_scanner().watch(interval=0.01)
+        self.assertEqual(len(next(watcher).added), 3)
+        self.write("third.py", SCRIPT.format("third"))
+        self.assertEqual(
+            next(watcher).added, [os.path.join(self.script_dir, "third.py")]
+        )
+        watcher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from clinto.parser import Parser
+
+
+@unittest.skipUnless(
+    hasattr(socket, "AF_UNIX") and hasattr(os, "fork"),
+    "The server requires Unix sockets and fork",
+)
+class TestExtractionServer(unittest.TestCase):
+    def setUp(self):
+        from clinto.server import ExtractionServer
+
+        self.base_dir = os.path.split(__file__)[0]
+        self.script_dir = os.path.join(self.base_dir, "argparse_scripts")
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.socket_path = os.path.join(self.temp_dir, "clinto.sock")
+
+        self.server = ExtractionServer(self.socket_path, preload=["json"])
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_request_description(self):
+        from clinto.server import request_description
+
+        script_path = os.path.join(self.script_dir, "choices.py")
+        result = request_description(self.socket_path, script_path, socket_timeout=30)
+        self.assertEqual(result.error, "")
+        self.assertEqual(
+            result.description,
+            Parser(script_path=script_path).get_script_description(),
+        )
+
+    def test_script_defined_default(self):
+        from clinto.server import request_description
+
+        script_path = os.path.join(self.script_dir, "enum_default.py")
+        result = request_description(
+            self.socket_path, script_path, socket_timeout=30, timeout=10
+        )
+        self.assertEqual(result.error, "")
+        node = result.description["inputs"][""][0]["nodes"][0]
+        self.assertEqual(node["value"], "Color.RED")
+
+    def test_socket_is_private(self):
+        self.assertEqual(os.stat(self.socket_path).st_mode & 0o777, 0o600)
+
+    def test_script_cannot_affect_server(self):
+        from clinto.server import request_description
+
+        script_path = os.path.join(self.temp_dir, "exits.py")
+        with open(script_path, "w") as f:
+            f.write("import os\nos._exit(1)\n")
+        with self.assertRaises(EOFError):
+            request_description(self.socket_path, script_path, socket_timeout=30)
+
+        # The server carries on with the next request
+        script_path = os.path.join(self.script_dir, "error_script.py")
+        result = request_description(self.socket_path, script_path, socket_timeout=30)
+        self.assertIsNone(result.description)
+        self.assertIn("something_i_dont_have", result.error)
+
+    def test_only_removes_stale_sockets(self):
+        from clinto.server import ExtractionServer, request_description
+
+        # A server is already listening
+        with self.assertRaises(OSError):
+            ExtractionServer(self.socket_path)
+        script_path = os.path.join(self.script_dir, "choices.py")
+        result = request_description(self.socket_path, script_path, socket_timeout=30)
+        self.assertEqual(result.error, "")
+
+        file_path = os.path.join(self.temp_dir, "not_a_socket")
+        with open(file_path, "w") as f:
+            f.write("data")
+        with self.assertRaises(FileExistsError):
+            ExtractionServer(file_path)
+        with open(file_path) as f:
+            self.assertEqual(f.read(), "data")
+
+        # Left behind by a server that is gone
+        stale_path = os.path.join(self.temp_dir, "stale.sock")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(stale_path)
+        server = ExtractionServer(stale_path)
+        server.server_close()
+        self.assertFalse(os.path.exists(stale_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
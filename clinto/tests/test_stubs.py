@@ -0,0 +1,123 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from clinto.parser import Parser
+from clinto.parsers.stubs import StubModule, stubbed_imports
+
+HEAVY_SCRIPT = """
+import argparse
+import heavy_dependency as hd
+from heavy_dependency.io import loaders
+
+parser = argparse.ArgumentParser(description=hd.__name__)
+parser.add_argument("--threshold", type=hd.float64, default=0.5)
+parser.add_argument("--loader", choices=["csv", "json"])
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+"""
+
+
+class TestStubImports(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = os.path.split(__file__)[0]
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.script_path = os.path.join(self.temp_dir, "heavy.py")
+        with open(self.script_path, "w") as f:
+            f.write(HEAVY_SCRIPT)
+
+    def test_stubs_listed_modules(self):
+        parser = Parser(script_path=self.script_path, stub_imports=["heavy_dependency"])
+        self.assertEqual("", parser.error)
+        description = parser.get_script_description()
+        self.assertEqual(description["description"], "heavy_dependency")
+        nodes = description["inputs"][""][0]["nodes"]
+        self.assertEqual(nodes[0]["name"], "threshold")
+        self.assertEqual(nodes[0]["model"], "CharField")
+        self.assertNotIn("heavy_dependency", sys.modules)
+
+    def test_stubs_non_stdlib_modules(self):
+        script_path = os.path.join(self.base_dir, "argparse_scripts", "error_script.py")
+        parser = Parser(script_path=script_path, stub_imports=True)
+        self.assertEqual("", parser.error)
+        self.assertNotIn("something_i_dont_have", sys.modules)
+
+    def test_local_modules_are_not_stubbed(self):
+        with open(os.path.join(self.temp_dir, "local_module.py"), "w") as f:
+            f.write("VALUE = 1\n")
+        with stubbed_imports(True, local_path=self.temp_dir):
+            sys.path.insert(0, self.temp_dir)
+            try:
+                import local_module
+                import heavy_dependency
+            finally:
+                sys.path.remove(self.temp_dir)
+                sys.modules.pop("local_module", None)
+        self.assertEqual(local_module.VALUE, 1)
+        self.assertIsInstance(heavy_dependency, StubModule)
+
+    def test_local_modules_importing_stubs_are_removed(self):
+        with open(os.path.join(self.temp_dir, "heavy_settings.py"), "w") as f:
+            f.write("import heavy_lib\nDEFAULT = heavy_lib.compute()\n")
+        script_path = os.path.join(self.temp_dir, "uses_settings.py")
+        with open(script_path, "w") as f:
+            f.write(
+                "import argparse\n"
+                "from heavy_settings import DEFAULT\n"
+                "parser = argparse.ArgumentParser()\n"
+                "parser.add_argument('--value', default=DEFAULT)\n"
+            )
+        stubbed = Parser(script_path=script_path, stub_imports=["heavy_lib"])
+        self.assertEqual("", stubbed.error)
+        self.assertNotIn("heavy_settings", sys.modules)
+        self.assertNotIn("heavy_lib", sys.modules)
+
+        parser = Parser(script_path=script_path)
+        self.assertFalse(parser.valid)
+        self.assertIn("heavy_lib", parser.error)
+
+    def test_standard_library_modules_are_kept(self):
+        script_path = os.path.join(self.temp_dir, "uses_fractions.py")
+        with open(script_path, "w") as f:
+            f.write(
+                "import argparse\n"
+                "import fractions\n"
+                "import numpy\n"
+                "parser = argparse.ArgumentParser()\n"
+                "parser.add_argument('--ratio', default=fractions.Fraction(1, 3))\n"
+            )
+        # Make sure the script is the first to import it
+        fractions_module = sys.modules.pop("fractions", None)
+        if fractions_module is not None:
+            self.addCleanup(sys.modules.__setitem__, "fractions", fractions_module)
+
+        parser = Parser(script_path=script_path, stub_imports=["numpy"])
+        self.assertEqual("", parser.error)
+        self.assertNotIn("numpy", sys.modules)
+        import fractions
+
+        value = parser.get_script_description()["inputs"][""][0]["nodes"][0]["value"]
+        self.assertIsInstance(value, fractions.Fraction)
+
+    def test_stubs_of_other_contexts_are_kept(self):
+        with stubbed_imports(["outer_dependency"]):
+            import outer_dependency
+
+            with stubbed_imports(["inner_dependency"]):
+                import inner_dependency
+            self.assertNotIn("inner_dependency", sys.modules)
+            self.assertIs(sys.modules["outer_dependency"], outer_dependency)
+        self.assertNotIn("outer_dependency", sys.modules)
+        self.assertIsInstance(inner_dependency, StubModule)
+
+    def test_without_stubs(self):
+        parser = Parser(script_path=self.script_path)
+        self.assertIn("heavy_dependency", parser.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import types
+import unittest
+
+from clinto.cli import main
+from clinto.parser import Parser
+from clinto.triage import (
+    ARGPARSE,
+    DELEGATED_CONFIDENCE,
+    DOCOPT,
+    NOT_CLI,
+    score_source,
+    triage_script,
+    triage_scripts,
+)
+
+
+class TestTriage(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = os.path.split(__file__)[0]
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def write(self, name, source):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "w") as f:
+            f.write(source)
+        return path
+
+    def test_clis(self):
+        for script, kind in (
+            ("argparse_scripts/choices.py", ARGPARSE),
+            ("argparse_scripts/zip_app_rel_imports.zip", ARGPARSE),
+            ("docopt_scripts/naval_fate.py", DOCOPT),
+        ):
+            result = triage_script(os.path.join(self.base_dir, script))
+            self.assertEqual(result.kind, kind)
+            self.assertEqual(result.confidence, 1.0)
+
+    def test_source_is_searched_in_place(self):
+        script_path = os.path.join(self.base_dir, "argparse_scripts", "choices.py")
+        with open(script_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                # Without slicing, so the mapping cannot be copied
+                searchable = types.SimpleNamespace(find=data.find)
+                result = score_source(script_path, searchable, data.readline)
+        self.assertEqual(result.kind, ARGPARSE)
+        self.assertEqual(result.confidence, 1.0)
+
+    def test_not_clis(self):
+        library = self.write(
+            "library.py",
+            "import argparse\n"
+            "def build_parser():\n"
+            "    return argparse.ArgumentParser()\n",
+        )
+        # Mentioned only in comments and strings
+        mentions = self.write(
+            "mentions.py",
+            "# We do not use argparse.ArgumentParser().parse_args() here\n"
+            "HELP = 'parser.add_argument is not called'\n",
+        )
+        unrelated = self.write("unrelated.py", "x = 1\n")
+        empty = self.write("empty.py", "")
+        with open(os.path.join(self.base_dir, "argparse_scripts", "choices.py")) as f:
+            test_file = self.write("test_cli.py", f.read())
+        results = list(triage_scripts([library, mentions, unrelated, empty, test_file]))
+        self.assertEqual([i.kind for i in results], [NOT_CLI] * 5)
+        self.assertEqual(results[2].confidence, 1.0)
+        self.assertFalse(results[1].signals)
+
+    def test_parser_built_elsewhere(self):
+        helpers = self.write(
+            "cli_helpers.py",
+            "import argparse\n"
+            "def build_parser():\n"
+            "    parser = argparse.ArgumentParser()\n"
+            "    parser.add_argument('--name')\n"
+            "    return parser\n",
+        )
+        script = self.write(
+            "tool.py",
+            "from cli_helpers import build_parser\n"
+            "if __name__ == '__main__':\n"
+            "    args = build_parser().parse_args()\n",
+        )
+        # No local import or __main__ check to go on
+        unrelated = self.write(
+            "options.py", "opts, args = OptionParser().parse_args()\n"
+        )
+
+        results = list(triage_scripts([helpers, script, unrelated]))
+        self.assertEqual([i.kind for i in results], [NOT_CLI, ARGPARSE, NOT_CLI])
+        self.assertEqual(results[1].confidence, DELEGATED_CONFIDENCE)
+        self.assertIn("local_import", results[1].signals)
+        self.assertTrue(Parser(script_path=script).valid)
+
+    def test_cli_triage(self):
+        self.write("library.py", "import argparse\n")
+        shutil.copy(
+            os.path.join(self.base_dir, "argparse_scripts", "choices.py"),
+            self.temp_dir,
+        )
+        output = os.path.join(self.temp_dir, "specs.jsonl")
+
+        main([self.temp_dir, "--triage-report", "-o", output])
+        with open(output) as f:
+            report = dict(
+                (os.path.basename(i["path"]), i["kind"]) for i in map(json.loads, f)
+            )
+        self.assertEqual(report, {"choices.py": ARGPARSE, "library.py": NOT_CLI})
+
+        self.assertEqual(main([self.temp_dir, "--triage", "-o", output]), 0)
+        with open(output) as f:
+            paths = [os.path.basename(json.loads(i)["path"]) for i in f]
+        self.assertEqual(paths, ["choices.py"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,236 @@
+"""
+Classify scripts as argparse CLIs, docopt CLIs or neither before anything is executed,
+so that library modules and tests can be skipped cheaply.
+
+Files are memory-mapped, and those not mentioning argparse, docopt or parsing arguments
+at all are ruled out without being read any further. The rest are tokenized, so names
+appearing only in comments or strings are not taken as evidence.
+"""
+
+import io
+import mmap
+import os
+import tokenize
+import zipfile
+from collections import namedtuple
+
+from .fingerprint import resolve_module
+from .parsers import ArgParseParser, DocOptParser
+
+ARGPARSE = "argparse"
+DOCOPT = "docopt"
+NOT_CLI = "none"
+
+KINDS = [(ARGPARSE, ArgParseParser), (DOCOPT, DocOptParser)]
+
+# The confidence a script needs to be taken as a CLI. Modules that build parsers but
+# never parse arguments or check for __main__ stay below it.
+CLI_THRESHOLD = 0.75
+# Test files may build parsers without being CLIs, so their confidence is scaled down
+TEST_FILE_FACTOR = 0.4
+# The highest confidence for scripts that parse arguments with a parser (or usage)
+# built elsewhere, such as a sibling module's build_parser()
+DELEGATED_CONFIDENCE = 0.5
+
+# Substrings at least one of which a CLI contains
+CLI_MARKERS = (b"argparse", b"docopt", b"parse_args", b"parse_known_args")
+
+# The names worth recording as signals
+SIGNAL_NAMES = {
+    "ArgumentParser",
+    "add_argument",
+    "argparse",
+    "docopt",
+    "parse_args",
+    "parse_known_args",
+}
+
+TriageResult = namedtuple("TriageResult", ["path", "kind", "confidence", "signals"])
+
+
+def is_test_file(script_path):
+    name = os.path.basename(script_path)
+    return (
+        name.startswith("test_") or name.endswith("_test.py") or name == "conftest.py"
+    )
+
+
+def scan_tokens(readline):
+    """
+    Collects the signals a CLI is defined from the tokens read with readline:
+    import:<name>, name:<name> and attr:<name> for the SIGNAL_NAMES imported or used,
+    call:docopt, usage for a string with a usage section and main_guard for an
+    ``if __name__ == "__main__"`` check.
+
+    Returns the signals and the top level names of the modules imported. Relative
+    imports are left out, as a script run directly cannot make them.
+    """
+    signals = set()
+    modules = set()
+    previous = []
+    for token in tokenize.tokenize(readline):
+        if token.type in (
+            tokenize.COMMENT,
+            tokenize.NL,
+            tokenize.NEWLINE,
+            tokenize.INDENT,
+            tokenize.DEDENT,
+            tokenize.ENCODING,
+        ):
+            continue
+        last = previous[-1] if previous else None
+        if last in ("import", "from") and token.type == tokenize.NAME:
+            modules.add(token.string)
+        if token.type == tokenize.NAME and token.string in SIGNAL_NAMES:
+            if last in ("import", "from"):
+                signals.add("import:{0}".format(token.string))
+            elif last == ".":
+                signals.add("attr:{0}".format(token.string))
+            else:
+                signals.add("name:{0}".format(token.string))
+        elif token.type == tokenize.STRING:
+            if "usage:" in token.string.lower():
+                signals.add("usage")
+            if token.string.strip("'\"") == "__main__" and previous[-2:] == [
+                "__name__",
+                "==",
+            ]:
+                signals.add("main_guard")
+        elif token.string == "(" and last == "docopt":
+            signals.add("call:docopt")
+        previous = (previous + [token.string])[-2:]
+    return signals, modules
+
+
+def get_delegated_kind(signals):
+    """
+    Returns the kind of CLI that signals show arguments being parsed for, without the
+    parser being built in the same file, or None.
+    """
+    if signals & {
+        "attr:parse_args",
+        "attr:parse_known_args",
+        "name:parse_args",
+        "name:parse_known_args",
+    }:
+        return ARGPARSE
+    if "call:docopt" in signals:
+        return DOCOPT
+    return None
+
+
+class SearchableSource(object):
+    """
+    Answers the substring checks of the parser heuristics (``"argparse" in source``)
+    by searching data, e.g. a memory-mapped file, in place rather than decoding a copy.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __contains__(self, text):
+        # An mmap searches from its current position by default
+        return self.data.find(text.encode("utf-8"), 0) != -1
+
+
+def score_source(script_path, data, readline, script_ext=None, is_local_module=None):
+    """
+    Returns a TriageResult for the source in data, which readline reads by line. data
+    only needs a find method, like bytes or an mmap.
+
+    :param is_local_module: Whether a top level module name is one of the script's
+      own. Defaults to looking for it next to script_path.
+    """
+    if all(data.find(i) == -1 for i in CLI_MARKERS):
+        return TriageResult(script_path, NOT_CLI, 1.0, frozenset())
+
+    if is_local_module is None:
+        script_dir = os.path.dirname(os.path.abspath(script_path))
+
+        def is_local_module(name):
+            return bool(resolve_module(script_dir, name))
+
+    try:
+        signals, modules = scan_tokens(readline)
+    except (tokenize.TokenError, SyntaxError):
+        # Fall back to the substring checks alone
+        signals, modules = set(), set()
+    if any(is_local_module(i) for i in modules):
+        # Imports a module of its own, which may build its parser
+        signals.add("local_import")
+    signals = frozenset(signals)
+    source = SearchableSource(data)
+    if script_ext is None:
+        script_ext = os.path.splitext(script_path)[1]
+
+    scores = []
+    for kind, parser_class in KINDS:
+        matches = parser_class.heuristic(script_ext, source) + (
+            parser_class.token_heuristic(signals)
+        )
+        scores.append((float(sum(matches)) / float(len(matches)), kind))
+    confidence, kind = max(scores)
+    if is_test_file(script_path):
+        confidence *= TEST_FILE_FACTOR
+    elif confidence < CLI_THRESHOLD:
+        # Arguments parsed with a parser imported from elsewhere. Parser handles
+        # these, so they are kept, if with less confidence.
+        delegated_kind = get_delegated_kind(signals)
+        evidence = signals & {"local_import", "main_guard"}
+        if delegated_kind is not None and evidence:
+            confidence = DELEGATED_CONFIDENCE * (1 + len(evidence)) / 3.0
+            return TriageResult(
+                script_path, delegated_kind, round(confidence, 2), signals
+            )
+    if confidence < CLI_THRESHOLD:
+        return TriageResult(script_path, NOT_CLI, round(1.0 - confidence, 2), signals)
+    return TriageResult(script_path, kind, round(confidence, 2), signals)
+
+
+def triage_script(script_path):
+    """
+    Classifies the script (or zip app) at script_path, returning a TriageResult. kind
+    is one of ARGPARSE, DOCOPT or NOT_CLI, and confidence, from 0 to 1, how sure the
+    classification is.
+    """
+    if zipfile.is_zipfile(script_path):
+        with zipfile.ZipFile(script_path) as archive:
+            try:
+                data = archive.read("__main__.py")
+            except KeyError:
+                return TriageResult(script_path, NOT_CLI, 1.0, frozenset())
+            names = set(archive.namelist())
+
+        def is_local_module(name):
+            return (
+                "{0}.py".format(name) in names
+                or "{0}/__init__.py".format(name) in names
+            )
+
+        return score_source(
+            script_path,
+            data,
+            io.BytesIO(data).readline,
+            script_ext=".py",
+            is_local_module=is_local_module,
+        )
+
+    with open(script_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return TriageResult(script_path, NOT_CLI, 1.0, frozenset())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return score_source(script_path, data, data.readline)
+
+
+def triage_scripts(script_paths):
+    """
+    Yields a TriageResult for each script in script_paths. Scripts that cannot be read
+    are reported as NOT_CLI with a confidence of 0.
+    """
+    for script_path in script_paths:
+        try:
+            yield triage_script(script_path)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            yield TriageResult(script_path, NOT_CLI, 0.0, frozenset())
@@ -1,4 +1,14 @@
+import contextvars
+import importlib.abc
+import importlib.machinery
+import json
+import os
 import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Sized
+from contextlib import contextmanager
+from itertools import islice
 
 
 # TODO: Move this stuff to a utils file
@@ -14,8 +24,227 @@ def is_upload(action):
     )
 
 
-def expand_iterable(choices):
+PLAIN_TYPES = (str, bytes, int, float, bool, type(None))
+
+
+def to_plain_data(value):
+    """
+    Copies value, keeping containers and primitives. Anything else, such as an object
+    defined by a script, is replaced by its string representation so that nothing
+    created by the script stays referenced.
+    """
+    # Exact types, as subclasses (e.g. an IntEnum) may be defined by the script
+    if type(value) in PLAIN_TYPES:
+        return value
+    if isinstance(value, dict):
+        dict_type = OrderedDict if isinstance(value, OrderedDict) else dict
+        return dict_type((to_plain_data(k), to_plain_data(v)) for k, v in value.items())
+    for container_type in (list, tuple, set, frozenset):
+        if isinstance(value, container_type):
+            return container_type(to_plain_data(i) for i in value)
+    return str(value)
+
+
+class SpecJSONEncoder(json.JSONEncoder):
+    """
+    Encodes script descriptions, whose param_action entries are sets. Sets are written
+    as sorted lists and any other object as its string representation.
+    """
+
+    def default(self, o):
+        if isinstance(o, (set, frozenset)):
+            try:
+                return sorted(o)
+            except TypeError:
+                return sorted(o, key=repr)
+        return str(o)
+
+
+def dump_json(value, fp, chunk_size=1 << 16):
+    """
+    Writes value as JSON to the file-like object fp, in chunks of about chunk_size
+    characters, so the complete document is never held in memory.
+    """
+    buffered = []
+    buffered_size = 0
+    for chunk in SpecJSONEncoder().iterencode(value):
+        buffered.append(chunk)
+        buffered_size += len(chunk)
+        if buffered_size >= chunk_size:
+            fp.write("".join(buffered))
+            buffered = []
+            buffered_size = 0
+    if buffered:
+        fp.write("".join(buffered))
+
+
+def redirect_script_output(mode="w"):
+    """
+    Scripts may print while they are executed, which would corrupt anything written to
+    stdout. Points file descriptor 1, which child processes inherit, at stderr and
+    returns a file, opened with mode, for the original stdout.
+    """
+    sys.stdout.flush()
+    output = os.fdopen(os.dup(sys.stdout.fileno()), mode)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    return output
+
+
+def expand_iterable(choices, limit=None):
+    """
+    Expands an iterable into a list, of at most limit items. We use this to expand generators/etc.
+    """
+    return list(islice(choices, limit)) if hasattr(choices, "__iter__") else None
+
+
+# The plain containers truncated values are copied into. Subclasses (e.g. defaultdict
+# or a namedtuple) may not take an iterable of items in their constructor.
+PLAIN_CONTAINERS = (dict, list, tuple, frozenset, set)
+
+
+def truncate_value(value, limit):
+    """
+    Copies the first limit items of a list, tuple, set or dict into a plain one of its
+    kind. Anything else, or anything within the limit, is returned as is.
+    """
+    if (
+        limit is None
+        or not isinstance(value, (list, tuple, set, frozenset, dict))
+        or len(value) <= limit
+    ):
+        return value
+    if isinstance(value, dict):
+        return dict(islice(value.items(), limit))
+    container = next(i for i in PLAIN_CONTAINERS if isinstance(value, i))
+    return container(islice(value, limit))
+
+
+def range_length(value):
+    """
+    The number of items in the range value, however large.
+    """
+    if value.step > 0:
+        return max(0, (value.stop - value.start + value.step - 1) // value.step)
+    return max(0, (value.start - value.stop - value.step - 1) // -value.step)
+
+
+def describe_truncation(name, value, limit):
+    """
+    Describes what was left out when value was cut down to limit items, as extra
+    description entries prefixed with name. Returns an empty dict if nothing was.
+    Iterables without a length, such as generators, cannot be described.
+    """
+    if limit is None:
+        return {}
+    if isinstance(value, range):
+        # len() raises OverflowError for ranges longer than sys.maxsize
+        count = range_length(value)
+    elif isinstance(value, Sized):
+        count = len(value)
+    else:
+        return {}
+    if count <= limit:
+        return {}
+    attrs = {
+        "{0}_truncated".format(name): True,
+        "{0}_count".format(name): count,
+    }
+    if isinstance(value, range):
+        attrs["{0}_range".format(name)] = {
+            "start": value.start,
+            "stop": value.stop,
+            "step": value.step,
+        }
+    return attrs
+
+
+# Directories searched for top level imports in the current context only, in place of
+# inserting them into the process wide sys.path
+_context_sys_path = contextvars.ContextVar("clinto_context_sys_path", default=())
+_install_lock = threading.Lock()
+
+
+class ContextPathFinder(importlib.abc.MetaPathFinder):
+    """
+    Finds top level modules in the directories added by context_sys_path for the
+    current thread (or asyncio task) only.
+    """
+
+    def find_spec(self, fullname, path=None, target=None):
+        paths = _context_sys_path.get()
+        if path is not None or not paths:
+            return None
+        return importlib.machinery.PathFinder.find_spec(fullname, list(paths))
+
+
+_context_path_finder = ContextPathFinder()
+
+
+def install_meta_path_finder(finder, before=importlib.machinery.PathFinder):
+    """
+    Installs finder on sys.meta_path once, ahead of the finder before (or first if
+    before is None or not installed).
+    """
+    with _install_lock:
+        if finder in sys.meta_path:
+            return
+        index = 0
+        if before is not None and before in sys.meta_path:
+            index = sys.meta_path.index(before)
+        sys.meta_path.insert(index, finder)
+
+
+def get_context_sys_path():
+    return _context_sys_path.get()
+
+
+@contextmanager
+def context_sys_path(path):
+    """
+    Makes modules in path importable for the duration of the context, taking precedence
+    over sys.path, without changing sys.path for other threads.
+    """
+    if not path:
+        yield
+        return
+    install_meta_path_finder(_context_path_finder)
+    token = _context_sys_path.set((path,) + _context_sys_path.get())
+    try:
+        yield
+    finally:
+        _context_sys_path.reset(token)
+
+
+# The names of the modules imported in the current context, while recording them
+_recorded_imports = contextvars.ContextVar("clinto_recorded_imports", default=None)
+
+
+class ImportRecorder(importlib.abc.MetaPathFinder):
+    """
+    Records the modules looked up for the current thread (or asyncio task), if it is
+    within recorded_imports. It never finds a module itself.
+    """
+
+    def find_spec(self, fullname, path=None, target=None):
+        imported = _recorded_imports.get()
+        if imported is not None:
+            imported.add(fullname)
+        return None
+
+
+_import_recorder = ImportRecorder()
+
+
+@contextmanager
+def recorded_imports():
     """
-    Expands an iterable into a list. We use this to expand generators/etc.
+    Yields a set that collects the names of the modules imported for the first time
+    within the context. Imports by other threads are not included.
     """
-    return [i for i in choices] if hasattr(choices, "__iter__") else None
+    install_meta_path_finder(_import_recorder, before=None)
+    imported = set()
+    token = _recorded_imports.set(imported)
+    try:
+        yield imported
+    finally:
+        _recorded_imports.reset(token)
@@ -9,3 +9,5 @@ PY_FULL_VERSION = (
 )
 PY_MINOR_VERSION = (sys.version_info.major, sys.version_info.minor)
 PY36 = (3, 6)
+
+__version__ = "0.6.0"